@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -89,13 +90,90 @@ AWS_DEFAULT_ACL = 'public-read'
 
 STORAGES = {
     "default": {
-        "BACKEND": "storages.backends.s3.S3Storage",
+        # S3Storage with a local read-through disk cache, see BioStack/storage.py
+        "BACKEND": "BioStack.storage.CachedS3Storage",
     },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.StaticFilesStorage",
     },
 }
 
+# Cache
+# Redis is shared by every worker, so signal based invalidation reaches all of them.
+# The local memory fallback is per process, keep its page cache short lived.
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+    PROFILE_PAGE_CACHE_TIMEOUT = 60 * 60
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+    PROFILE_PAGE_CACHE_TIMEOUT = 60
+
+DASHBOARD_CACHE_TIMEOUT = 60  # seconds, cleared early on analytics flush / profile edit
+SECTION_FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60  # rendered theme section blocks, keyed by updated_at so never stale
+
+# Analytics ingestion: views / clicks are queued per worker and written in batches
+ANALYTICS_BUFFER_SIZE = 10000      # max queued events before new ones are dropped
+ANALYTICS_BATCH_SIZE = 500         # flush as soon as this many are queued
+ANALYTICS_FLUSH_INTERVAL = 5       # seconds, flush whatever is queued
+ANALYTICS_ROLLUP_LAG = 5 * 60      # seconds the rollup watermark trails "now" (late buffered events)
+ANALYTICS_RETENTION_MONTHS = 13    # raw views / clicks kept, older months live on in the daily rollups
+
+# Repeat views by the same visitor (ip + user agent) inside this window are not counted
+# (across all workers with Redis, per worker with the local memory cache; see profiles/dedup.py)
+PROFILE_VIEW_DEDUP_WINDOW = 30 * 60     # seconds
+PROFILE_VIEW_DEDUP_CAPACITY = 100000    # visitors per window (sizes each Bloom filter bitmap, ~180 KB)
+
+# track_link_click keeps section id -> url in memory per worker
+LINK_REDIRECT_CACHE_SIZE = 10000
+LINK_REDIRECT_CACHE_TTL = 60            # seconds, bounds staleness in other workers after an edit
+
+SHOWCASE_PAGE_SIZE = 24                 # cards per showcase page / infinite scroll fetch
+
+# Showcase "trending" order, scores refreshed by `manage.py refresh_trending` (cron)
+TRENDING_WINDOW_DAYS = 14
+TRENDING_HALF_LIFE_DAYS = 3
+TRENDING_CLICK_WEIGHT = 3               # a link click counts as this many views
+
+# Blog: list pages and articles are cached until the next Blogs save / delete
+BLOG_PAGE_SIZE = 10
+BLOG_CACHE_TIMEOUT = 60 * 60
+BLOG_FEED_ITEMS = 20
+BLOG_FEED_MAX_AGE = 5 * 60              # seconds feed readers may reuse a feed without revalidating
+
+# Resized WebP / JPEG copies of uploaded images, rendered in a background pool
+IMAGE_VARIANT_WIDTHS = (160, 320, 640)
+IMAGE_VARIANT_WORKERS = 2
+
+# Profile search (tsvector + GIN on PostgreSQL, in-process inverted index elsewhere)
+SEARCH_CONFIG = "english"               # text search configuration, run rebuild_search_index after changing
+SEARCH_RESULT_LIMIT = 48
+
+# Upload validation: checked from the image header before anything is decoded
+IMAGE_MAX_PIXELS = 24_000_000           # width * height
+IMAGE_MAX_DIMENSION = 10_000            # px per side
+DIRECT_UPLOAD_EXPIRES = 10 * 60         # lifetime of presigned POSTs for direct-to-bucket photo uploads
+                                        # (the bucket needs a CORS rule allowing POST from the site)
+
+# Local disk cache in front of S3 for server-side media reads (BioStack/storage.py)
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "biostack-media-cache"))
+MEDIA_CACHE_MAX_BYTES = 512 * 1024 * 1024
+MEDIA_CACHE_VERIFY = False              # re-hash entries on every hit (the size is always checked)
+MEDIA_CACHE_REVALIDATE = 60             # seconds before a hit is revalidated against S3 (If-None-Match)
+
+# Favicons for LINKS sections, served from /profile/favicon/<domain>/ for linked domains only (profiles/favicons.py)
+FAVICON_TTL = 7 * 24 * 60 * 60
+FAVICON_FETCHER = "profiles.favicons.fetch_from_google"  # callable(domain) -> bytes or None
+
 #PAYMENT INTEGRATION 
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
@@ -160,7 +238,9 @@ else:
 
     EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
     EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
-    SITE_ID = 1
+
+# Absolute URLs (blog share links, feeds) use this Site's domain, never the request's Host header
+SITE_ID = 1
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,321 @@
+"""
+Media storage with a local read-through disk cache.
+
+Server-side image work (variants, article image sizes, admin previews)
+opens media files through the default storage, which on S3 is a network
+round trip per file. `CachedS3Storage` keeps the bytes of every file it
+reads in MEDIA_CACHE_DIR, bounded to MEDIA_CACHE_MAX_BYTES with least
+recently used eviction (file mtimes, so the cache is shared by every
+worker on the host).
+
+Each entry stores the SHA-256, size and S3 ETag of its content beside it.
+Fills are checked against the ETag when it is a plain MD5. A hit is checked
+against the stored size (with MEDIA_CACHE_VERIFY also re-hashed), so a
+truncated or corrupted entry is refetched instead of served.
+
+Writes and deletes through the storage drop the local copy on this host
+only, and S3 names may be overwritten in place, so an entry older than
+MEDIA_CACHE_REVALIDATE seconds is revalidated with a conditional GET
+(If-None-Match on its ETag) before it is served again.
+
+Hit / miss / eviction counts are kept per process and flushed to the
+default cache every few operations; `manage.py media_cache_stats` reports
+them with the disk usage.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = getattr(settings, "MEDIA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "biostack-media-cache"))
+MAX_BYTES = getattr(settings, "MEDIA_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+VERIFY = getattr(settings, "MEDIA_CACHE_VERIFY", False)
+REVALIDATE = getattr(settings, "MEDIA_CACHE_REVALIDATE", 60)
+
+# Evict down to this fraction of MAX_BYTES, so eviction doesn't run on every fill
+EVICT_TO = 0.9
+CHUNK_SIZE = 64 * 1024
+
+METRICS = ("hits", "misses", "evictions", "corrupt")
+_METRICS_KEY = "media_cache:{}"
+_FLUSH_EVERY = 50
+
+
+class CacheMetrics:
+    """Per-process counters, added to the shared cache every _FLUSH_EVERY events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = dict.fromkeys(METRICS, 0)
+        self._events = 0
+
+    def record(self, metric, amount=1):
+        with self._lock:
+            self._pending[metric] += amount
+            self._events += 1
+            if self._events < _FLUSH_EVERY:
+                return
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending, self._events = self._pending, dict.fromkeys(METRICS, 0), 0
+        for metric, amount in pending.items():
+            if not amount:
+                continue
+            key = _METRICS_KEY.format(metric)
+            # incr() raises on a missing key; add() is a no-op on an existing one
+            cache.add(key, 0, None)
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                cache.set(key, amount, None)
+
+    @staticmethod
+    def totals():
+        values = cache.get_many([_METRICS_KEY.format(metric) for metric in METRICS])
+        return {metric: values.get(_METRICS_KEY.format(metric), 0) for metric in METRICS}
+
+
+metrics = CacheMetrics()
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalCacheMixin:
+    """
+    Read-through disk cache for any storage. `_fetch` does the remote read,
+    `_changed` tells whether a cached version is out of date.
+    """
+
+    cache_dir = CACHE_DIR
+    cache_max_bytes = MAX_BYTES
+    cache_verify = VERIFY
+    cache_revalidate = REVALIDATE
+
+    _size_lock = threading.Lock()
+    _cached_bytes = None  # estimate of the cache size, None until first scanned
+
+    # --- local entries ---
+
+    def _local_path(self, name):
+        digest = hashlib.sha1(clean_name(name).encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def _read_sidecar(self, path):
+        """(sha256, size, version) stored beside an entry, None if it is missing or unreadable."""
+        try:
+            with open(path + ".sha256") as handle:
+                digest, size, version = handle.read().split("\n")
+            return digest, int(size), version or None
+        except (OSError, ValueError):
+            return None
+
+    def _drop_local(self, name):
+        path = self._local_path(name)
+        for target in (path, path + ".sha256"):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+
+    def _cached_path(self, name):
+        """Path of a valid local copy of `name`, or None."""
+        path = self._local_path(name)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        sidecar = self._read_sidecar(path)
+        if sidecar is None or sidecar[1] != size or (self.cache_verify and _sha256_file(path) != sidecar[0]):
+            metrics.record("corrupt")
+            self._drop_local(name)
+            return None
+        try:
+            # The sidecar's mtime is when the entry was last validated against the storage
+            if time.time() - os.path.getmtime(path + ".sha256") > self.cache_revalidate:
+                if self._changed(name, sidecar[2]):
+                    self._drop_local(name)
+                    return None
+                os.utime(path + ".sha256")
+            # The entry's mtime is the LRU clock
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def _fill(self, name):
+        path = self._local_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".fill-")
+        try:
+            with os.fdopen(handle, "wb") as out:
+                digest, size, version = self._fetch(name, out)
+            # Sidecar first: an entry without one is treated as corrupt
+            with open(temp_path + ".sha256", "w") as sidecar:
+                sidecar.write(f"{digest}\n{size}\n{version or ''}")
+            os.replace(temp_path + ".sha256", path + ".sha256")
+            os.replace(temp_path, path)
+        except BaseException:
+            for target in (temp_path, temp_path + ".sha256"):
+                if os.path.exists(target):
+                    os.remove(target)
+            raise
+        self._account(size)
+        return path
+
+    def _fetch(self, name, out):
+        """Copy `name` from the backing storage into `out`. Returns (sha256 hex, size, version)."""
+        digest, size = hashlib.sha256(), 0
+        with super()._open(name, "rb") as remote:
+            for chunk in remote.chunks(CHUNK_SIZE):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size, None
+
+    def _changed(self, name, version):
+        """True if the stored `name` no longer matches the cached `version`."""
+        return False
+
+    # --- eviction ---
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                if filename.endswith(".sha256") or filename.startswith(".fill-"):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _account(self, size):
+        with self._size_lock:
+            if LocalCacheMixin._cached_bytes is None:
+                LocalCacheMixin._cached_bytes = sum(entry[1] for entry in self._entries())
+            else:
+                LocalCacheMixin._cached_bytes += size
+            if LocalCacheMixin._cached_bytes <= self.cache_max_bytes:
+                return
+            LocalCacheMixin._cached_bytes = self.evict()
+
+    def evict(self, target=None):
+        """Remove least recently used entries until the cache fits. Returns the bytes left."""
+        target = self.cache_max_bytes * EVICT_TO if target is None else target
+        entries = sorted(self._entries())
+        total = sum(entry[1] for entry in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            for victim in (path, path + ".sha256"):
+                try:
+                    os.remove(victim)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            metrics.record("evictions")
+        return total
+
+    # --- storage API ---
+
+    def _open(self, name, mode="rb"):
+        if "r" not in mode or "+" in mode or "w" in mode:
+            return super()._open(name, mode)
+        path = self._cached_path(name)
+        if path is not None:
+            metrics.record("hits")
+        else:
+            metrics.record("misses")
+            try:
+                path = self._fill(name)
+            except FileNotFoundError:
+                raise
+            except OSError:
+                # Local disk trouble must not break reads
+                logger.exception("Media cache fill failed for %s", name)
+                return super()._open(name, mode)
+        return File(open(path, mode), name=name)
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        self._drop_local(name)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        self._drop_local(name)
+
+    def size(self, name):
+        path = self._cached_path(name)
+        if path is not None:
+            return os.path.getsize(path)
+        return super().size(name)
+
+
+class CachedS3Storage(LocalCacheMixin, S3Storage):
+    """S3Storage whose reads are served from the local disk cache."""
+
+    def _get_object(self, name, **kwargs):
+        try:
+            return self.connection.meta.client.get_object(
+                Bucket=self.bucket_name, Key=self._normalize_name(clean_name(name)), **kwargs
+            )
+        except ClientError as e:
+            # Same contract as S3Storage._open: a missing key is a FileNotFoundError
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(name) from e
+            raise
+
+    def _fetch(self, name, out):
+        response = self._get_object(name)
+        digest, md5, size = hashlib.sha256(), hashlib.md5(), 0
+        for chunk in response["Body"].iter_chunks(CHUNK_SIZE):
+            digest.update(chunk)
+            md5.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+
+        # Multipart ETags ("<md5>-<parts>") aren't a content hash, only single-part ones are
+        etag = response.get("ETag", "").strip('"')
+        if etag and "-" not in etag and etag != md5.hexdigest():
+            raise OSError(f"Checksum mismatch fetching {name} from S3")
+        return digest.hexdigest(), size, etag or None
+
+    def _changed(self, name, version):
+        if version is None:
+            return True
+        try:
+            response = self._get_object(name, IfNoneMatch=f'"{version}"')
+        except FileNotFoundError:
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+                return False
+            logger.warning("Could not revalidate %s", name, exc_info=True)
+            return False
+        except BotoCoreError:
+            # S3 unreachable: keep serving the local copy, retry on the next hit
+            logger.warning("Could not revalidate %s", name, exc_info=True)
+            return False
+        response["Body"].close()
+        return True
@@ -0,0 +1,134 @@
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from BioStack import views
+from BioStack.storage import CachedS3Storage, LocalCacheMixin
+from profiles.models import Profile
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:  # moto is only needed for the S3 tests
+    mock_aws = None
+
+
+class CachedFileSystemStorage(LocalCacheMixin, FileSystemStorage):
+    pass
+
+
+class LocalCacheMixinTests(SimpleTestCase):
+    def setUp(self):
+        self.storage = CachedFileSystemStorage(location=tempfile.mkdtemp())
+        self.storage.cache_dir = tempfile.mkdtemp()
+
+    def test_second_read_is_served_locally(self):
+        name = self.storage.save("a/one.bin", ContentFile(b"hello"))
+        with self.storage.open(name) as handle:
+            self.assertEqual(handle.read(), b"hello")
+        self.assertIsNotNone(self.storage._cached_path(name))
+
+    def test_truncated_entry_is_refetched(self):
+        name = self.storage.save("a/two.bin", ContentFile(b"hello world"))
+        self.storage.open(name).close()
+        with open(self.storage._local_path(name), "wb") as handle:
+            handle.write(b"hello")
+        self.assertIsNone(self.storage._cached_path(name))
+        with self.storage.open(name) as handle:
+            self.assertEqual(handle.read(), b"hello world")
+
+    def test_missing_file_raises_file_not_found(self):
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open("a/missing.bin")
+
+
+@unittest.skipIf(mock_aws is None, "moto is not installed")
+class CachedS3StorageTests(SimpleTestCase):
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="media")
+        self.storage = self.host()
+
+    def host(self):
+        # Each host has its own disk cache
+        storage = CachedS3Storage(
+            bucket_name="media", region_name="us-east-1", access_key="test", secret_key="test", default_acl=None
+        )
+        storage.cache_dir = tempfile.mkdtemp()
+        return storage
+
+    def test_missing_key_raises_file_not_found(self):
+        # Callers such as blogs.rendering only handle OSError
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open("profile_images/missing.png")
+
+    def test_existing_key_is_cached(self):
+        name = self.storage.save("profile_images/one.bin", ContentFile(b"x" * 100))
+        self.assertEqual(self.storage.open(name).read(), b"x" * 100)
+        self.assertIsNotNone(self.storage._cached_path(name))
+
+    def test_overwrite_on_another_host_is_picked_up(self):
+        name = self.storage.save("profile_images/me.png", ContentFile(b"old"))
+        self.assertEqual(self.storage.open(name).read(), b"old")
+
+        # file_overwrite: another host replaces the object under the same name
+        self.host().save(name, ContentFile(b"new"))
+        self.assertEqual(self.storage.open(name).read(), b"old")  # within the revalidation TTL
+        self.storage.cache_revalidate = 0
+        self.assertEqual(self.storage.open(name).read(), b"new")
+
+    def test_unchanged_entry_is_served_after_revalidation(self):
+        name = self.storage.save("profile_images/me.png", ContentFile(b"same"))
+        self.storage.open(name).close()
+        self.storage.cache_revalidate = 0
+        self.assertFalse(self.storage._changed(name, self.storage._read_sidecar(self.storage._local_path(name))[2]))
+        self.assertIsNotNone(self.storage._cached_path(name))
+
+
+class ShowcaseCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        created_at = datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        cursor = views._encode_cursor(created_at, 42)
+        self.assertEqual(views._decode_cursor(cursor, datetime.fromisoformat), (created_at, 42))
+        cursor = views._encode_cursor(0.1 + 0.2, 7)
+        self.assertEqual(views._decode_cursor(cursor, float), (0.1 + 0.2, 7))
+
+    def test_garbage_is_ignored(self):
+        for cursor in ("", "not-base64!", views._encode_cursor("x", 1), views._encode_cursor(1.5, 1)[:-2]):
+            self.assertIsNone(views._decode_cursor(cursor, datetime.fromisoformat), cursor)
+
+
+class ShowcasePaginationTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="show@example.com", username="show")
+        self.public = [
+            Profile.objects.create(user=user, slug=f"p{n}", visibility=Profile.PUBLIC).pk for n in range(5)
+        ]
+        Profile.objects.create(user=user, slug="hidden", visibility=Profile.PRIVATE)
+        # Ties on the ordering field are broken by id
+        Profile.objects.update(created_at=datetime(2026, 1, 1, tzinfo=timezone.utc), trending_score=1.5)
+
+    def walk(self, sort):
+        seen, params = [], {"sort": sort}
+        # Cards replaced by their profile ids
+        cards = mock.patch.object(views, "_showcase_cards", side_effect=lambda ids: ids)
+        with mock.patch.object(views, "SHOWCASE_PAGE_SIZE", 2), cards:
+            while True:
+                response = self.client.get(reverse("showcase"), params)
+                seen += response.context["cards"]
+                if not response.context["next_cursor"]:
+                    return seen
+                params["cursor"] = response.context["next_cursor"]
+
+    def test_every_public_profile_once_in_order(self):
+        for sort in ("new", "trending"):
+            self.assertEqual(self.walk(sort), sorted(self.public, reverse=True), sort)
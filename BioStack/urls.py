@@ -32,6 +32,7 @@ urlpatterns = [
 
     #Footer Views
     path('showcase/',views.showcase_view,name='showcase'),
+    path('search/',views.search_view,name='search'),
     path('terms/',views.terms_view,name='terms'),
     path('templates/',views.templates_view,name='templates'),
     path('templates/preview/<int:theme_id>/', views.theme_preview_view, name='theme_preview'),
@@ -1,4 +1,11 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponse
 from django.shortcuts import render,redirect,get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 # from django.contrib.auth import get_user_model
@@ -7,6 +14,17 @@ from django.views.decorators.clickjacking import xframe_options_sameorigin
 from profiles.forms import FeedbackForm
 from accounts.models import User
 from profiles.models import Profile,Theme
+from profiles.cache import get_cached_cards, cache_card
+from profiles.search import search_profiles
+from profiles.render_document import group_sections
+
+SHOWCASE_PAGE_SIZE = getattr(settings, "SHOWCASE_PAGE_SIZE", 24)
+
+# Only what a showcase card shows
+CARD_FIELDS = (
+    'id', 'slug', 'full_name', 'bio', 'profile_image',
+    'user__username', 'user__details__profile_image', 'theme__name',
+)
 
 class MockImage:
     """Simulates an ImageField file"""
@@ -98,7 +116,7 @@ def theme_preview_view(request, theme_id):
     return render(
         request,
         theme.template_name,
-        {"profile": dummy_profile, "sections": dummy_sections}
+        {"profile": dummy_profile, "sections": dummy_sections, "section_groups": group_sections(dummy_sections)}
     )
 
 def support(request):
@@ -150,9 +168,78 @@ def career_view(request):
 def privacy_view(request):
     return render(request,'pages/privacy.html')
 
+# ?sort= -> (ordering field, parser for the cursor value); ties broken by id
+SHOWCASE_SORTS = {
+    'new': ('created_at', datetime.fromisoformat),
+    'trending': ('trending_score', float),
+}
+
+
+def _encode_cursor(value, profile_id):
+    value = value.isoformat() if isinstance(value, datetime) else repr(value)
+    return urlsafe_base64_encode(f"{value}|{profile_id}".encode())
+
+
+def _decode_cursor(cursor, parse):
+    try:
+        value, profile_id = urlsafe_base64_decode(cursor).decode().split("|")
+        return parse(value), int(profile_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _showcase_cards(profile_ids):
+    """Rendered card html for `profile_ids` (in order), from the cache where possible."""
+    cards = get_cached_cards(profile_ids)
+    missing = [profile_id for profile_id in profile_ids if profile_id not in cards]
+
+    if missing:
+        profiles = Profile.objects.filter(id__in=missing).select_related('user__details', 'theme').only(*CARD_FIELDS)
+        for profile in profiles:
+            html = render_to_string('pages/_showcase_card.html', {'profile': profile})
+            cache_card(profile.id, html)
+            cards[profile.id] = html
+
+    return [cards[profile_id] for profile_id in profile_ids if profile_id in cards]
+
+
 def showcase_view(request):
-    profiles = Profile.objects.filter(visibility='PUBLIC').select_related('user__details').order_by('-created_at')
-    return render(request,'pages/showcase.html',{'profiles':profiles})
+    """
+    Public profiles, newest (default) or trending first, paginated on
+    (created_at, id) / (trending_score, id) instead of OFFSET so every page
+    is an index range scan. Pages after the first are requested by the
+    infinite scroll and only return the cards fragment.
+    """
+    sort = request.GET.get('sort') if request.GET.get('sort') in SHOWCASE_SORTS else 'new'
+    field, parse = SHOWCASE_SORTS[sort]
+    rows = Profile.objects.filter(visibility=Profile.PUBLIC).order_by(f'-{field}', '-id')
+
+    cursor = _decode_cursor(request.GET.get('cursor', ''), parse)
+    if cursor:
+        value, profile_id = cursor
+        rows = rows.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': profile_id}))
+
+    # One extra row tells us whether there is another page
+    page = list(rows.values_list('id', field)[:SHOWCASE_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(page) > SHOWCASE_PAGE_SIZE:
+        page = page[:SHOWCASE_PAGE_SIZE]
+        last_id, last_value = page[-1]
+        next_cursor = _encode_cursor(last_value, last_id)
+
+    context = {
+        'cards': _showcase_cards([profile_id for profile_id, _ in page]),
+        'next_cursor': next_cursor,
+        'sort': sort,
+    }
+    if 'cursor' in request.GET:
+        return HttpResponse(render_to_string('pages/_showcase_cards.html', context, request=request))
+    return render(request,'pages/showcase.html',context)
+
+def search_view(request):
+    query = request.GET.get('q', '').strip()[:100]
+    cards = _showcase_cards(search_profiles(query)) if query else []
+    return render(request,'pages/search.html',{'query':query,'cards':cards})
 
 def terms_view(request):
     return render(request,'pages/terms.html')
@@ -66,6 +66,9 @@ class LoginForm(forms.Form):
     
 
 class UserDetailForm(forms.ModelForm):
+    # Token of a direct-to-bucket upload (see uploads.py), sent instead of the file
+    profile_image_key = forms.CharField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = UserDetail
         exclude = ('user',)
@@ -0,0 +1,124 @@
+"""
+Upload hardening for every user-supplied image.
+
+`check_image_header` reads only the image header (format and dimensions),
+so a tiny file that would decode to a gigapixel bitmap is rejected before
+Pillow allocates anything. `CleanImageField` then re-encodes accepted
+uploads on save: EXIF orientation is applied to the pixels, all metadata
+(GPS, camera serials, ...) is dropped, and the result is spooled to a
+temporary file and handed to the storage as a file, which writes it in
+chunks instead of holding another copy in memory.
+"""
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db.models import ImageField
+from django.db.models.fields.files import ImageFieldFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+MAX_PIXELS = getattr(settings, "IMAGE_MAX_PIXELS", 24_000_000)
+MAX_DIMENSION = getattr(settings, "IMAGE_MAX_DIMENSION", 10_000)
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+
+# Re-encoded images up to this size stay in memory, bigger ones go to disk
+SPOOL_SIZE = 1024 * 1024
+
+ORIENTATION_TAG = 0x0112
+
+# image.info entries the encoders may read that affect the pixels, everything else
+# (JPEG comments, XMP, PNG text, ...) is dropped before saving
+PIXEL_INFO = ("transparency",)
+
+
+def check_image_header(file):
+    """Returns (format, width, height) from the header only, or raises ValidationError."""
+    position = file.tell() if hasattr(file, "tell") else 0
+    file.seek(0)
+    try:
+        # open() is lazy: it parses the header and stops before the pixel data
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except Image.DecompressionBombError:
+        # Pillow's own header check, for images far past any sane size
+        raise ValidationError(_too_large_message())
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError("Upload a valid JPEG, PNG, WebP or GIF image.")
+    finally:
+        file.seek(position)
+
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError("Upload a valid JPEG, PNG, WebP or GIF image.")
+    if width > MAX_DIMENSION or height > MAX_DIMENSION or width * height > MAX_PIXELS:
+        raise ValidationError(_too_large_message(width, height))
+    return image_format, width, height
+
+
+def _too_large_message(width=None, height=None):
+    limit = f"the limit is {MAX_PIXELS // 1_000_000} megapixels and {MAX_DIMENSION}px per side."
+    if width is None:
+        return f"Image is too large, {limit}"
+    return f"Image is {width}x{height} pixels, {limit}"
+
+
+def _without_metadata(image):
+    # Encoders fall back to image.info (e.g. the JPEG COM segment is copied from info["comment"])
+    image.info = {key: value for key, value in image.info.items() if key in PIXEL_INFO}
+    return image
+
+
+def clean_image(file):
+    """Re-encode `file` without metadata and with EXIF orientation applied. Returns a File."""
+    image_format, _, _ = check_image_header(file)
+    file.seek(0)
+
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    with Image.open(file) as image:
+        options = {}
+        if image.info.get("icc_profile"):
+            # Colour profile, not personal data: keep it so colours stay right
+            options["icc_profile"] = image.info["icc_profile"]
+
+        if image_format == "GIF":
+            # No EXIF in GIFs, and re-encoding would flatten animations
+            file.seek(0)
+            for chunk in iter(lambda: file.read(64 * 1024), b""):
+                spooled.write(chunk)
+        elif image.getexif().get(ORIENTATION_TAG, 1) != 1:
+            upright = _without_metadata(ImageOps.exif_transpose(image))
+            upright.save(spooled, image_format, quality=90, **options)
+        elif image_format == "JPEG":
+            # Upright already: reuse the original quantization, no generation loss
+            _without_metadata(image).save(spooled, "JPEG", quality="keep", subsampling="keep", **options)
+        else:
+            _without_metadata(image).save(spooled, image_format, **options)
+
+    spooled.seek(0)
+    return File(spooled, name=file.name)
+
+
+def was_uploaded(field_file):
+    """True if new content was stored through `field_file` since the last check."""
+    uploaded = getattr(field_file.instance, "_uploaded_images", set())
+    if field_file.field.attname not in uploaded:
+        return False
+    uploaded.discard(field_file.field.attname)
+    return True
+
+
+class CleanImageFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        cleaned = clean_image(content)
+        # Kept on the instance, save() swaps this field file for a new one. Set before
+        # the instance is saved so post_save receivers see it (profiles.images)
+        self.instance.__dict__.setdefault("_uploaded_images", set()).add(self.field.attname)
+        try:
+            super().save(name, cleaned, save)
+        finally:
+            cleaned.close()
+
+
+class CleanImageField(ImageField):
+    """ImageField that strips metadata and auto-orients uploads before storing them."""
+    attr_class = CleanImageFieldFile
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+import accounts.images
+import accounts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_userdetail_profile_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userdetail',
+            name='profile_image',
+            field=accounts.images.CleanImageField(blank=True, help_text='Upload a Image (max 4MB)', null=True, upload_to='profile_images/', validators=[accounts.models.validate_image_size, accounts.models.validate_image_pixels]),
+        ),
+    ]
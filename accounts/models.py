@@ -4,6 +4,7 @@ from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .managers import UserManager
+from .images import CleanImageField, check_image_header
 
 from django.core.exceptions import ValidationError
 
@@ -13,6 +14,10 @@ def validate_image_size(image):
     if file_size > limit_mb * 1024 * 1024:
         raise ValidationError(f"Max size of the file is {limit_mb} MB")
 
+def validate_image_pixels(image):
+    # Header only: a few KB can decode to gigabytes, refuse before Pillow decodes it
+    check_image_header(image)
+
 class User(AbstractBaseUser, PermissionsMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
@@ -35,7 +40,7 @@ class UserDetail(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='details')
     
     #profile Image
-    profile_image = models.ImageField(upload_to="profile_images/",blank=True,null=True,validators=[validate_image_size],help_text="Upload a Image (max 4MB)")
+    profile_image = CleanImageField(upload_to="profile_images/",blank=True,null=True,validators=[validate_image_size,validate_image_pixels],help_text="Upload a Image (max 4MB)")
 
     # Personal Fields
     full_name = models.CharField(max_length=255, blank=True)
@@ -1,3 +1,121 @@
-from django.test import TestCase
+import tempfile
+import unittest
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from . import uploads
+from .images import ORIENTATION_TAG, clean_image
+
+try:
+    import boto3
+    from moto import mock_aws
+    from storages.backends.s3 import S3Storage
+except ImportError:  # moto is only needed for the presign test
+    mock_aws = None
+
+LOCAL_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def jpeg_bytes(**options):
+    buffer = BytesIO()
+    Image.new("RGB", (64, 32), "blue").save(buffer, "JPEG", **options)
+    return buffer.getvalue()
+
+
+class CleanImageTests(SimpleTestCase):
+    def clean(self, data, name="photo.jpg"):
+        cleaned = clean_image(ContentFile(data, name=name))
+        self.addCleanup(cleaned.close)
+        return cleaned.read()
+
+    def test_jpeg_comment_is_dropped(self):
+        data = jpeg_bytes(comment=b"taken at 51.5007N 0.1246W")
+        self.assertIn(b"51.5007N", data)
+        cleaned = self.clean(data)
+        self.assertNotIn(b"51.5007N", cleaned)
+        with Image.open(BytesIO(cleaned)) as image:
+            self.assertNotIn("comment", image.info)
+
+    def test_rotated_jpeg_drops_comment_and_exif(self):
+        exif = Image.Exif()
+        exif[ORIENTATION_TAG] = 6
+        exif[0x010F] = "CameraMaker"
+        cleaned = self.clean(jpeg_bytes(comment=b"secret comment", exif=exif.tobytes()))
+        self.assertNotIn(b"secret comment", cleaned)
+        self.assertNotIn(b"CameraMaker", cleaned)
+        with Image.open(BytesIO(cleaned)) as image:
+            self.assertEqual(image.size, (32, 64))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), STORAGES=LOCAL_STORAGES)
+class DirectUploadTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user(email="owner@example.com", username="owner")
+        self.other = User.objects.create_user(email="other@example.com", username="other")
+        buffer = BytesIO()
+        Image.new("RGB", (40, 40), "red").save(buffer, "PNG")
+        self.key = default_storage.save(f"{uploads.PENDING_PREFIX}{self.owner.pk}/photo.png", ContentFile(buffer.getvalue()))
+
+    def token(self, key=None, user=None):
+        data = {"key": key or self.key, "user": str((user or self.owner).pk)}
+        return signing.dumps(data, salt=uploads._SALT)
+
+    def test_presign_needs_an_s3_storage(self):
+        self.assertIsNone(uploads.presign(self.owner, "photo.png"))
+
+    def test_attach_moves_the_upload_into_the_field(self):
+        details = self.owner.details
+        uploads.attach_upload(details, "profile_image", self.token(), self.owner)
+        details.refresh_from_db()
+        self.assertTrue(details.profile_image.name.startswith("profile_images/"))
+        self.assertFalse(default_storage.exists(self.key))
+
+    def test_another_users_token_is_rejected(self):
+        details = self.other.details
+        with self.assertRaisesMessage(ValidationError, "Invalid upload."):
+            uploads.attach_upload(details, "profile_image", self.token(), self.other)
+        details.refresh_from_db()
+        self.assertFalse(details.profile_image)
+        # Someone else's pending upload is left alone
+        self.assertTrue(default_storage.exists(self.key))
+
+    def test_key_outside_the_users_prefix_is_rejected(self):
+        other_key = f"{uploads.PENDING_PREFIX}{self.other.pk}/photo.png"
+        with self.assertRaisesMessage(ValidationError, "Invalid upload."):
+            uploads.claim(self.token(key=other_key), self.owner)
+
+    def test_tampered_token_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            uploads.claim(self.token() + "x", self.owner)
+
+    def test_unfinished_upload_is_rejected(self):
+        missing = f"{uploads.PENDING_PREFIX}{self.owner.pk}/missing.png"
+        with self.assertRaisesMessage(ValidationError, "did not finish"):
+            uploads.claim(self.token(key=missing), self.owner)
+
+
+@unittest.skipIf(mock_aws is None, "moto is not installed")
+class PresignTests(TestCase):
+    def test_presigned_key_is_under_the_users_pending_prefix(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="media")
+        storage = S3Storage(bucket_name="media", region_name="us-east-1", access_key="test", secret_key="test", default_acl=None)
+        user = get_user_model().objects.create_user(email="p@example.com", username="p")
+
+        upload = uploads.presign(user, "Photo.JPG", storage)
+        self.assertTrue(upload["fields"]["key"].startswith(f"{uploads.PENDING_PREFIX}{user.pk}/"))
+        self.assertTrue(upload["fields"]["key"].endswith(".jpg"))
+        self.assertEqual(signing.loads(upload["token"], salt=uploads._SALT)["user"], str(user.pk))
@@ -0,0 +1,93 @@
+"""
+Direct-to-bucket image uploads.
+
+Instead of streaming a photo through a Django worker, the browser asks
+`presign` for a presigned POST, uploads the file straight to the S3 bucket
+(under PENDING_PREFIX) and submits the form with the returned token in
+place of the file. `attach_upload` checks the token, the stored object's
+size and image header, then hands it to the image field, which strips the
+metadata and saves the final copy (see images.py) before the pending object
+is removed.
+
+Only S3-compatible storages can presign; with anything else `presign`
+returns None and the form falls back to a regular multipart upload.
+Set AWS_S3_ENDPOINT_URL to point at MinIO or a moto server locally.
+"""
+import posixpath
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from storages.utils import clean_name
+
+from .images import check_image_header
+
+PENDING_PREFIX = "uploads/pending/"
+MAX_BYTES = 4 * 1024 * 1024  # same limit as validate_image_size
+EXPIRES = getattr(settings, "DIRECT_UPLOAD_EXPIRES", 10 * 60)
+
+_SALT = "accounts.uploads"
+
+
+def supports_direct_upload(storage=default_storage):
+    return hasattr(storage, "bucket_name") and hasattr(storage, "connection")
+
+
+def presign(user, filename, storage=default_storage):
+    """Returns {"url", "fields", "token"} for a browser POST, or None if the storage can't presign."""
+    if not supports_direct_upload(storage):
+        return None
+
+    extension = posixpath.splitext(filename or "")[1].lower()[:10]
+    key = f"{PENDING_PREFIX}{user.pk}/{uuid.uuid4().hex}{extension}"
+    fields = {}
+    conditions = [
+        ["content-length-range", 1, MAX_BYTES],
+        ["starts-with", "$Content-Type", "image/"],
+    ]
+    if storage.default_acl:
+        fields["acl"] = storage.default_acl
+        conditions.append({"acl": storage.default_acl})
+
+    # storages' own key mapping, so `location` prefixes are respected
+    post = storage.connection.meta.client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=storage._normalize_name(clean_name(key)),
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=EXPIRES,
+    )
+    token = signing.dumps({"key": key, "user": str(user.pk)}, salt=_SALT)
+    return {"url": post["url"], "fields": post["fields"], "token": token}
+
+
+def claim(token, user, storage=default_storage):
+    """Validates an upload token for `user` and returns the pending storage name."""
+    try:
+        # The object can only be created while the POST policy is valid
+        data = signing.loads(token, salt=_SALT, max_age=EXPIRES * 2)
+    except signing.BadSignature:
+        raise ValidationError("The upload expired, please choose the image again.")
+
+    key = data.get("key", "")
+    if data.get("user") != str(user.pk) or not key.startswith(f"{PENDING_PREFIX}{user.pk}/"):
+        raise ValidationError("Invalid upload.")
+    if not storage.exists(key):
+        raise ValidationError("The upload did not finish, please try again.")
+    if storage.size(key) > MAX_BYTES:
+        storage.delete(key)
+        raise ValidationError(f"Max size of the file is {MAX_BYTES // (1024 * 1024)} MB")
+    return key
+
+
+def attach_upload(instance, field_name, token, user, storage=default_storage):
+    """Moves a direct upload into `instance.<field_name>` and saves the instance."""
+    key = claim(token, user, storage)
+    try:
+        with storage.open(key) as handle:
+            check_image_header(handle)
+            getattr(instance, field_name).save(posixpath.basename(key), handle, save=True)
+    finally:
+        storage.delete(key)
@@ -1,6 +1,6 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from .views import signup_view, login_view, logout_view,user_details
+from .views import signup_view, login_view, logout_view,user_details,presign_upload
 
 app_name = "accounts"
 
@@ -9,4 +9,5 @@ urlpatterns = [
     path("login/", login_view, name="login"),
     path("logout/", logout_view, name="logout"),
     path("userdetails/",user_details,name='userdetails'),
+    path("uploads/presign/",presign_upload,name='presign_upload'),
 ]
@@ -2,9 +2,13 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 
 from .forms import SignupForm, LoginForm,UserDetailForm
 from .models import UserDetail
+from .uploads import presign, attach_upload
 
 
 def signup_view(request):
@@ -48,7 +52,15 @@ def user_details(request):
         form = UserDetailForm(request.POST, request.FILES, instance=request.user.details)
         
         if form.is_valid():
-            form.save()
+            details = form.save()
+            # Photo uploaded straight to the bucket, only its token came with the form
+            upload_token = form.cleaned_data.get('profile_image_key')
+            if upload_token:
+                try:
+                    attach_upload(details, 'profile_image', upload_token, request.user)
+                except ValidationError as e:
+                    messages.error(request, f"Upload Failed: {e.messages[0]}")
+                    return redirect('accounts:userdetails')
             messages.success(request, "Global personal details updated successfully.")
             return redirect('accounts:userdetails')
             
@@ -67,3 +79,13 @@ def user_details(request):
         form = UserDetailForm(instance=request.user.details)
 
     return render(request, 'accounts/userdetails.html', {'form': form})
+
+
+@login_required
+@require_POST
+def presign_upload(request):
+    # Presigned POST for uploading a profile photo directly to the bucket
+    upload = presign(request.user, request.POST.get('filename', ''))
+    if upload is None:
+        return JsonResponse({'status': 'unsupported'}, status=404)
+    return JsonResponse({'status': 'success', **upload})
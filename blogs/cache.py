@@ -0,0 +1,66 @@
+"""
+Render cache for the blog.
+
+Every cached fragment is keyed by a generation number that is bumped on any
+Blogs save / delete, so one write invalidates all list pages and articles
+at once; the stale entries just expire.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
+
+BLOG_TIMEOUT = getattr(settings, "BLOG_CACHE_TIMEOUT", 60 * 60)
+
+_GENERATION_KEY = "blogs:generation"
+_CHANGED_AT_KEY = "blogs:changed_at"
+
+
+def _fresh_generation():
+    # Seeded from the clock so a counter lost to eviction never comes back
+    # as a value older entries were cached under
+    return int(time.time() * 1000)
+
+
+def generation():
+    value = cache.get(_GENERATION_KEY)
+    if value is None:
+        cache.add(_GENERATION_KEY, _fresh_generation(), None)
+        value = cache.get(_GENERATION_KEY)
+    return value
+
+
+def bump_generation():
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, _fresh_generation(), None)
+    # Deletes leave no updated_at behind, the feeds' Last-Modified uses this too
+    cache.set(_CHANGED_AT_KEY, int(time.time()), None)
+
+
+def changed_at():
+    """Unix time of the last blog save / delete, if the cache still knows it."""
+    return cache.get(_CHANGED_AT_KEY)
+
+
+def list_key(page_number):
+    return f"blogs:list:{generation()}:{page_number}"
+
+
+def site_origin(request):
+    """
+    scheme://domain of the current Site for absolute URLs. Never the Host
+    header: anyone can send any host, and it would add a cache entry per host.
+    """
+    return f"{request.scheme}://{get_current_site(request).domain}"
+
+
+def article_key(slug, origin):
+    # The share buttons carry the absolute URL, so the origin is part of the key
+    return f"blogs:article:{generation()}:{origin}:{slug}"
+
+
+def feed_key(kind, origin):
+    return f"blogs:feed:{generation()}:{origin}:{kind}"
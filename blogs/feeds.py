@@ -0,0 +1,98 @@
+"""
+RSS / Atom feeds for the blog.
+
+A feed is generated once per blog generation (see cache.py) and kept in the
+cache with a strong ETag and its Last-Modified time. Polls are answered
+from that entry alone: a reader that already has the current feed gets a
+304 without the database being touched.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+
+from .cache import BLOG_TIMEOUT, feed_key, changed_at, site_origin
+from .models import Blogs
+
+FEED_ITEMS = getattr(settings, "BLOG_FEED_ITEMS", 20)
+FEED_MAX_AGE = getattr(settings, "BLOG_FEED_MAX_AGE", 5 * 60)
+
+
+class BlogRssFeed(Feed):
+    title = "BioStack Blog"
+    description = "Theme releases, tutorials and platform updates from BioStack."
+
+    def link(self):
+        return reverse("blogs:home")
+
+    def items(self):
+        return Blogs.objects.defer("description", "rendered_html").order_by("-id")[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.sub_desc
+
+    def item_link(self, item):
+        return reverse("blogs:blog", args=[item.slug])
+
+    def item_categories(self, item):
+        return [item.category] if item.category else []
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class BlogAtomFeed(BlogRssFeed):
+    feed_type = Atom1Feed
+    subtitle = BlogRssFeed.description
+
+
+def _build(feed, request):
+    response = feed(request)
+    body = response.content
+    # Whole seconds, like the If-Modified-Since dates it is compared with
+    updated_at = Blogs.objects.order_by("-updated_at").values_list("updated_at", flat=True).first()
+    candidates = [int(updated_at.timestamp()) if updated_at else None, changed_at()]
+    candidates = [value for value in candidates if value is not None]
+    return {
+        "body": body,
+        "content_type": response["Content-Type"],
+        "etag": '"%s"' % hashlib.sha256(body).hexdigest()[:32],
+        "last_modified": max(candidates) if candidates else None,
+    }
+
+
+def cached_feed(feed, kind):
+    def view(request):
+        # Feed builds its links from the current Site too
+        key = feed_key(kind, site_origin(request))
+        entry = cache.get(key)
+        if entry is None:
+            entry = _build(feed, request)
+            cache.set(key, entry, BLOG_TIMEOUT)
+
+        response = get_conditional_response(request, etag=entry["etag"], last_modified=entry["last_modified"])
+        if response is None:
+            response = HttpResponse(entry["body"], content_type=entry["content_type"])
+        response["ETag"] = entry["etag"]
+        if entry["last_modified"] is not None:
+            response["Last-Modified"] = http_date(entry["last_modified"])
+        patch_cache_control(response, public=True, max_age=FEED_MAX_AGE)
+        return response
+
+    return view
+
+
+rss_feed = cached_feed(BlogRssFeed(), "rss")
+atom_feed = cached_feed(BlogAtomFeed(), "atom")
@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+from blogs.rendering import render_article
+
+
+def render_existing(apps, schema_editor):
+    Blogs = apps.get_model('blogs', 'Blogs')
+    for blog in Blogs.objects.all().iterator():
+        blog.rendered_html, blog.toc, blog.reading_time = render_article(blog.description)
+        blog.save(update_fields=['rendered_html', 'toc', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='rendered_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 22:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0002_blogs_reading_time_blogs_rendered_html_blogs_toc'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+import accounts.images
+import accounts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0003_blogs_created_at_blogs_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blogs',
+            name='thumbnail',
+            field=accounts.images.CleanImageField(blank=True, null=True, upload_to='blogs_thumbnail', validators=[accounts.models.validate_image_size, accounts.models.validate_image_pixels]),
+        ),
+    ]
@@ -2,6 +2,11 @@ from django.db import models
 from autoslug import AutoSlugField
 from tinymce.models import HTMLField
 
+from accounts.images import CleanImageField
+from accounts.models import validate_image_size, validate_image_pixels
+
+from .rendering import render_article
+
 # Create your models here.
 
 
@@ -23,7 +28,24 @@ class Blogs(models.Model):
 
     sub_desc = models.CharField(max_length=255)
     description = HTMLField()
-    thumbnail = models.ImageField(upload_to="blogs_thumbnail",blank=True,null=True)
+    thumbnail = CleanImageField(upload_to="blogs_thumbnail",blank=True,null=True,validators=[validate_image_size,validate_image_pixels])
+
+    # Built from `description` on every save (see rendering.py), served as is
+    rendered_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    reading_time = models.PositiveIntegerField(default=1, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        # Picked up by blogs.signals, which builds their variants and re-renders
+        self._pending_images = []
+        self.rendered_html, self.toc, self.reading_time = render_article(self.description, self._pending_images)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "description" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"rendered_html", "toc", "reading_time", "updated_at"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -0,0 +1,277 @@
+"""
+Save-time rendering of blog articles.
+
+`render_article` takes the raw TinyMCE HTML and returns the sanitized body
+(allowlisted tags / attributes / URL schemes / style properties only), a
+table of contents built from the h2 / h3 headings (which get unique anchor
+ids), and the reading time. Images are made lazy and, when they live in our
+media storage, get their real width / height so the page doesn't jump
+while they load. Blogs.save() stores the result, requests only emit it.
+
+Media images also get a srcset of their resized variants (profiles/images.py)
+once those exist; images whose variants aren't known yet are handed back so
+blogs.signals can build them and re-render the article.
+"""
+import logging
+import math
+import posixpath
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+from PIL import Image
+
+from profiles import images
+
+logger = logging.getLogger(__name__)
+
+WORDS_PER_MINUTE = 200
+# The article column: 8 of 12 grid columns in a max-w-6xl container on lg screens
+IMAGE_SIZES = "(min-width: 1024px) 740px, 100vw"
+
+ALLOWED_TAGS = {
+    "p", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6", "strong", "b", "em", "i", "u", "s", "sub", "sup",
+    "blockquote", "pre", "code", "ul", "ol", "li", "a", "img", "figure", "figcaption", "iframe",
+    "table", "thead", "tbody", "tfoot", "tr", "th", "td", "caption", "span", "div",
+}
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title", "target"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "iframe": {"src", "title", "width", "height", "allowfullscreen"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan", "scope"},
+    "ol": {"start"},
+}
+# On every allowed tag: TinyMCE's align and backcolor buttons write inline styles
+GLOBAL_ATTRIBUTES = {"style"}
+# Only these declarations survive in a style attribute, with values matching the pattern
+COLOR_VALUE = re.compile(r"^(#[0-9a-f]{3,8}|rgba?\([\d\s.,%]+\)|[a-z]+)$")
+STYLE_PROPERTIES = {
+    "text-align": re.compile(r"^(left|right|center|justify)$"),
+    "color": COLOR_VALUE,
+    "background-color": COLOR_VALUE,
+}
+VOID_TAGS = {"br", "hr", "img"}
+# Dropped together with everything inside them
+DROP_CONTENT_TAGS = {"script", "style", "object", "embed", "noscript", "template", "svg", "math", "head", "title"}
+
+# Tags whose end tag HTML lets authors omit: opening one closes an open sibling
+IMPLIED_END = {"li": {"li"}, "p": {"p"}, "tr": {"tr", "td", "th"}, "td": {"td", "th"}, "th": {"td", "th"}}
+
+URL_ATTRIBUTES = {"href", "src"}
+SAFE_SCHEMES = {"", "http", "https", "mailto"}
+# Embeds from TinyMCE's media plugin
+IFRAME_HOSTS = {"www.youtube.com", "youtube.com", "www.youtube-nocookie.com", "player.vimeo.com"}
+
+TOC_LEVELS = {"h2", "h3"}
+
+
+def _safe_url(value):
+    # Browsers ignore whitespace / control characters inside the scheme
+    cleaned = re.sub(r"[\x00-\x20]", "", value)
+    try:
+        return urlsplit(cleaned).scheme.lower() in SAFE_SCHEMES
+    except ValueError:
+        return False
+
+
+def _safe_style(value):
+    """`value` reduced to the allowlisted declarations, "" if none are left."""
+    declarations = []
+    for declaration in value.split(";"):
+        name, _, prop_value = declaration.partition(":")
+        name, prop_value = name.strip().lower(), prop_value.strip().lower()
+        pattern = STYLE_PROPERTIES.get(name)
+        if pattern and pattern.match(prop_value):
+            declarations.append(f"{name}: {prop_value}")
+    return "; ".join(declarations)
+
+
+def _media_name(src):
+    """Storage name of a src under MEDIA_URL, or None (also for paths that leave it)."""
+    media_url = settings.MEDIA_URL
+    if not media_url or not src.startswith(media_url):
+        return None
+    name = posixpath.normpath(unquote(re.split(r"[?#]", src[len(media_url):])[0]))
+    # The author controls src: S3 would happily resolve "a/../../etc/passwd" to a real key
+    if name.startswith(("/", "..")) or name == ".":
+        return None
+    return name
+
+
+def _media_image_size(name):
+    """(width, height) of an image stored in our media storage, or None."""
+    try:
+        with default_storage.open(name) as handle:
+            return Image.open(handle).size
+    except (OSError, ValueError, SuspiciousFileOperation):
+        return None
+    except Exception:
+        # Storage backend errors (credentials, endpoint, ...) must not fail the save
+        logger.warning("Could not read article image %s", name, exc_info=True)
+        return None
+
+
+class ArticleRenderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pending_images = []  # media image names without known variants
+        self.out = []
+        self.open_tags = []
+        self.dropping = 0
+        self.words = 0
+        self.toc = []
+        self.anchors = set()
+        self.heading = None  # (tag, index of its start tag in self.out, text parts, attributes)
+
+    # --- helpers ---
+
+    def _attributes(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set()) | GLOBAL_ATTRIBUTES
+        cleaned = {}
+        for name, value in attrs:
+            if name not in allowed:
+                continue
+            value = value or ""
+            if name in URL_ATTRIBUTES and not _safe_url(value):
+                continue
+            if name == "style":
+                value = _safe_style(value)
+                if not value:
+                    continue
+            cleaned[name] = value
+
+        if tag == "a" and cleaned.get("target") == "_blank":
+            cleaned["rel"] = "noopener noreferrer"
+        if tag == "img":
+            self._media_attributes(cleaned)
+            cleaned.update(loading="lazy", decoding="async")
+        if tag == "iframe":
+            cleaned["loading"] = "lazy"
+        return cleaned
+
+    def _media_attributes(self, cleaned):
+        """Intrinsic size and variant srcset for an <img> served from our media storage."""
+        name = _media_name(cleaned.get("src", ""))
+        if name is None:
+            return
+        widths = images.available_widths(name)
+        if widths is None:
+            self.pending_images.append(name)
+        has_size = "width" in cleaned or "height" in cleaned
+        if has_size and not widths:
+            return
+
+        size = _media_image_size(name)
+        if size is None:
+            return
+        if not has_size:
+            cleaned["width"], cleaned["height"] = str(size[0]), str(size[1])
+        if widths:
+            candidates = [f"{default_storage.url(images.variant_name(name, width, 'jpg'))} {width}w" for width in widths]
+            cleaned["srcset"] = ", ".join(candidates + [f"{cleaned['src']} {size[0]}w"])
+            cleaned["sizes"] = IMAGE_SIZES
+
+    def _start_tag(self, tag, attributes):
+        parts = [tag] + [f'{name}="{escape(value)}"' for name, value in attributes.items()]
+        return "<" + " ".join(parts) + ">"
+
+    def _anchor(self, text):
+        base = slugify(text) or "section"
+        anchor, number = base, 2
+        while anchor in self.anchors:
+            anchor, number = f"{base}-{number}", number + 1
+        self.anchors.add(anchor)
+        return anchor
+
+    # --- parser callbacks ---
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+
+        attributes = self._attributes(tag, attrs)
+        if tag == "iframe" and urlsplit(attributes.get("src", "")).hostname not in IFRAME_HOSTS:
+            # Unknown embed: skip the tag (its fallback content still renders)
+            return
+        if tag == "img" and "src" not in attributes:
+            return
+
+        if self.open_tags and self.open_tags[-1] in IMPLIED_END.get(tag, ()):
+            self.handle_endtag(self.open_tags[-1])
+
+        self.out.append(self._start_tag(tag, attributes))
+        if tag in VOID_TAGS:
+            return
+        self.open_tags.append(tag)
+        if tag in TOC_LEVELS and self.heading is None:
+            self.heading = (tag, len(self.out) - 1, [], attributes)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+
+        # Close anything left open inside this tag
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.out.append(f"</{current}>")
+            if self.heading and current == self.heading[0]:
+                self._finish_heading()
+            if current == tag:
+                break
+
+    def _finish_heading(self):
+        tag, index, parts, attributes = self.heading
+        self.heading = None
+        title = " ".join("".join(parts).split())
+        if not title:
+            return
+        anchor = self._anchor(title)
+        self.out[index] = self._start_tag(tag, {"id": anchor, **attributes})
+        self.toc.append({"level": int(tag[1]), "id": anchor, "title": title})
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.out.append(escape(data, quote=False))
+        self.words += len(data.split())
+        if self.heading:
+            self.heading[2].append(data)
+
+    def close(self):
+        super().close()
+        for tag in reversed(self.open_tags):
+            self.out.append(f"</{tag}>")
+        self.open_tags = []
+        if self.heading:
+            self._finish_heading()
+
+
+def render_article(raw_html, pending_images=None):
+    """
+    Returns (sanitized html, toc entries, reading time in minutes). Media
+    images whose variants aren't known yet are appended to `pending_images`.
+    """
+    renderer = ArticleRenderer()
+    renderer.feed(raw_html or "")
+    renderer.close()
+    if pending_images is not None:
+        pending_images.extend(renderer.pending_images)
+    reading_time = max(1, math.ceil(renderer.words / WORDS_PER_MINUTE))
+    return "".join(renderer.out), renderer.toc, reading_time
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from profiles.images import schedule_field_variants, schedule_variants
+
+from .cache import bump_generation
+from .models import Blogs
+from .rendering import render_article
+
+
+@receiver([post_save, post_delete], sender=Blogs)
+def clear_blog_cache(sender, instance, **kwargs):
+    bump_generation()
+
+
+@receiver(post_save, sender=Blogs)
+def build_thumbnail_variants(sender, instance, **kwargs):
+    if instance.thumbnail:
+        # Cached list pages / articles point at the original until the next generation
+        schedule_field_variants(instance.thumbnail, on_ready=bump_generation)
+
+
+def rerender_article(blog_id):
+    blog = Blogs.objects.filter(pk=blog_id).first()
+    if blog is None:
+        return
+    rendered_html, toc, reading_time = render_article(blog.description)
+    # update() rather than save(): no signals, and the article wasn't edited
+    Blogs.objects.filter(pk=blog_id).update(rendered_html=rendered_html, toc=toc, reading_time=reading_time)
+    bump_generation()
+
+
+@receiver(post_save, sender=Blogs)
+def build_article_image_variants(sender, instance, **kwargs):
+    # Inline media images get their srcset once the variants exist
+    blog_id = instance.pk
+    for name in dict.fromkeys(getattr(instance, "_pending_images", ())):
+        schedule_variants(name, on_ready=lambda: rerender_article(blog_id))
@@ -1,3 +1,183 @@
-from django.test import TestCase
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from PIL import Image
+
+from profiles import images
+
+from . import cache as blog_cache
+from .models import Blogs
+from .rendering import render_article
+
+
+def png_file(width, height):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "green").save(buffer, "PNG")
+    return ContentFile(buffer.getvalue())
+
+
+class RenderArticleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("blogs.rendering.default_storage")
+        self.storage = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage.url.side_effect = lambda name: f"/media/{name}"
+
+    def render(self, raw_html):
+        return render_article(raw_html)[0]
+
+    def test_editor_styles_are_kept(self):
+        html = self.render(
+            '<p style="text-align: center;">Title</p>'
+            '<p><span style="background-color: #f1c40f; color: rgb(0, 0, 0);">marked</span></p>'
+        )
+        self.assertIn('<p style="text-align: center">', html)
+        self.assertIn('<span style="background-color: #f1c40f; color: rgb(0, 0, 0)">', html)
+
+    def test_unsafe_styles_are_dropped(self):
+        html = self.render(
+            '<p style="position: fixed; top: 0; color: red">a</p>'
+            '<div style="background-color: url(javascript:alert(1))">b</div>'
+        )
+        self.assertIn('<p style="color: red">', html)
+        self.assertIn("<div>", html)
+        self.assertNotIn("position", html)
+        self.assertNotIn("javascript", html)
+
+    def test_media_src_outside_media_root_is_never_opened(self):
+        for src in ("/media/../../etc/passwd", "/media/a/../../etc/passwd", "/media//etc/passwd"):
+            html = self.render(f'<img src="{src}">')
+            self.assertNotIn("width=", html)
+            self.assertIn('loading="lazy"', html)
+        self.storage.open.assert_not_called()
+
+    def test_storage_errors_do_not_fail_the_render(self):
+        self.storage.open.side_effect = RuntimeError("Unable to locate credentials")
+        with self.assertLogs("blogs.rendering", "WARNING"):
+            html = self.render('<img src="/media/blog/a.png">')
+        self.assertIn('src="/media/blog/a.png"', html)
+
+    def test_media_image_gets_size_and_variant_srcset(self):
+        self.storage.open.return_value = png_file(1000, 500)
+        cache.set(images._cache_key("blog/a.png"), [320, 640], None)
+        html = self.render('<img src="/media/blog/a.png" alt="A">')
+        self.assertIn('width="1000" height="500"', html)
+        self.assertIn(
+            'srcset="/media/blog/a__w320.jpg 320w, /media/blog/a__w640.jpg 640w, /media/blog/a.png 1000w"', html
+        )
+        self.assertIn('sizes="', html)
+
+    def test_images_without_known_variants_are_reported(self):
+        self.storage.open.return_value = png_file(1000, 500)
+        pending = []
+        html = render_article('<img src="/media/blog/a.png"><img src="https://example.com/b.png">', pending)[0]
+        self.assertEqual(pending, ["blog/a.png"])
+        self.assertNotIn("srcset", html)
+
+
+class ArticleImageVariantTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("blogs.rendering.default_storage")
+        storage = patcher.start()
+        self.addCleanup(patcher.stop)
+        storage.url.side_effect = lambda name: f"/media/{name}"
+        storage.open.side_effect = lambda name: png_file(1000, 500)
+
+    def test_article_is_rerendered_once_variants_exist(self):
+        with mock.patch("blogs.signals.schedule_variants") as schedule:
+            blog = Blogs.objects.create(title="Hello", sub_desc="x", description='<p><img src="/media/blog/a.png"></p>')
+        self.assertNotIn("srcset", blog.rendered_html)
+        name, kwargs = schedule.call_args.args[0], schedule.call_args.kwargs
+        self.assertEqual(name, "blog/a.png")
+
+        cache.set(images._cache_key("blog/a.png"), [320], None)
+        kwargs["on_ready"]()
+        blog.refresh_from_db()
+        self.assertIn("/media/blog/a__w320.jpg 320w", blog.rendered_html)
+
+
+class BlogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with mock.patch("blogs.signals.schedule_variants"):
+            self.blog = Blogs.objects.create(title="Cached", sub_desc="teaser", description="<p>first version</p>")
+        self.url = reverse("blogs:blog", args=[self.blog.slug])
+
+    def test_article_is_cached_per_site_not_per_host(self):
+        first = self.client.get(self.url, HTTP_HOST="a.example")
+        second = self.client.get(self.url, HTTP_HOST="attacker-chosen.example")
+        self.assertEqual(first.status_code, 200)
+        self.assertContains(second, "http://example.com" + self.url)
+        self.assertNotContains(second, "attacker-chosen.example")
+        self.assertIsNotNone(cache.get(blog_cache.article_key(self.blog.slug, "http://example.com")))
+        self.assertIsNone(cache.get(blog_cache.article_key(self.blog.slug, "http://attacker-chosen.example")))
+
+    def test_save_bumps_the_generation(self):
+        self.assertContains(self.client.get(self.url), "first version")
+        before = blog_cache.generation()
+        self.blog.description = "<p>second version</p>"
+        with mock.patch("blogs.signals.schedule_variants"):
+            self.blog.save()
+        self.assertGreater(blog_cache.generation(), before)
+        self.assertContains(self.client.get(self.url), "second version")
+
+    def test_list_pages_are_cached_until_a_blog_changes(self):
+        self.assertContains(self.client.get(reverse("blogs:home")), "Cached")
+        self.assertIsNotNone(cache.get(blog_cache.list_key(1)))
+        with mock.patch("blogs.signals.schedule_variants"):
+            Blogs.objects.create(title="Newer post", sub_desc="teaser", description="<p>body</p>")
+        self.assertIsNone(cache.get(blog_cache.list_key(1)))
+        self.assertContains(self.client.get(reverse("blogs:home")), "Newer post")
+
+    def test_out_of_range_pages_are_not_cached(self):
+        self.client.get(reverse("blogs:home"), {"page": 99})
+        self.assertIsNone(cache.get(blog_cache.list_key(99)))
+
+    def test_feed_is_cached_per_site(self):
+        self.client.get(reverse("blogs:feed_rss"), HTTP_HOST="a.example")
+        self.client.get(reverse("blogs:feed_rss"), HTTP_HOST="b.example")
+        self.assertIsNotNone(cache.get(blog_cache.feed_key("rss", "http://example.com")))
+        self.assertIsNone(cache.get(blog_cache.feed_key("rss", "http://b.example")))
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with mock.patch("blogs.signals.schedule_variants"):
+            Blogs.objects.create(title="First post", sub_desc="teaser", description="<p>body</p>")
+        self.url = reverse("blogs:feed_rss")
+
+    def test_matching_etag_is_answered_from_the_cache(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "First post")
+        self.assertIn("max-age=", response["Cache-Control"])
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        with self.assertNumQueries(0):
+            again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], response["ETag"])
+
+        not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_new_post_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with mock.patch("blogs.signals.schedule_variants"):
+            Blogs.objects.create(title="Second post", sub_desc="teaser", description="<p>body</p>")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Second post")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_atom_feed(self):
+        response = self.client.get(reverse("blogs:feed_atom"))
+        self.assertTrue(response["Content-Type"].startswith("application/atom+xml"))
+        self.assertContains(response, "First post")
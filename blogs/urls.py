@@ -1,7 +1,10 @@
 from django.urls import path
 from blogs import views
+from blogs.feeds import rss_feed, atom_feed
 
 urlpatterns = [
     path("",views.blog_view,name='home'),
+    path("feed/rss/",rss_feed,name="feed_rss"),
+    path("feed/atom/",atom_feed,name="feed_atom"),
     path("<slug:slug>/",views.blog_details,name="blog"),
 ]
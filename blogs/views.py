@@ -1,12 +1,61 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.shortcuts import render,get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .cache import BLOG_TIMEOUT, list_key, article_key, site_origin
 from .models import Blogs
 
+BLOG_PAGE_SIZE = getattr(settings, "BLOG_PAGE_SIZE", 10)
+
 # Create your views here.
 def blog_view(request):
-    blogs = Blogs.objects.all().order_by("-id")
+    try:
+        page_number = int(request.GET.get("page", 1))
+    except ValueError:
+        page_number = 1
 
-    return render(request,'pages/blog.html',{"blogs":blogs})
+    key = list_key(page_number)
+    list_html = cache.get(key)
+    if list_html is None:
+        # The list only shows titles / teasers, leave the HTML bodies in the database
+        blogs = Blogs.objects.defer("description").order_by("-id")
+        page = Paginator(blogs, BLOG_PAGE_SIZE).get_page(page_number)
+        list_html = render_to_string("pages/_blog_list.html", {"page": page})
+        # Out of range numbers fall back to another page, don't cache those
+        if page.number == page_number:
+            cache.set(key, list_html, BLOG_TIMEOUT)
+
+    return render(request,'pages/blog.html',{"list_html":list_html})
 
 def blog_details(request,slug):
-    blog = get_object_or_404(Blogs, slug = slug)
-    return render(request,"pages/blog_details.html",{"blog":blog})
+    origin = site_origin(request)
+    key = article_key(slug, origin)
+    article = cache.get(key)
+    if article is None:
+        # The body is served from the stored rendered_html, skip the raw one
+        blog = get_object_or_404(Blogs.objects.defer("description"), slug = slug)
+        html = render_to_string("pages/_blog_article.html", {"blog": blog, "share_url": origin + request.path})
+        article = {"title": blog.title, "html": html, "etag": hashlib.md5(html.encode()).hexdigest()}
+        cache.set(key, article, BLOG_TIMEOUT)
+
+    # The navbar depends on who is logged in: the session cookie changes on
+    # login / logout, so it goes into the ETag. Pending flash messages are
+    # never answered with a 304.
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME, "")
+    etag = '"%s"' % hashlib.md5(f"{article['etag']}:{session}".encode()).hexdigest()
+    if "messages" not in request.COOKIES:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+    response = render(request,"pages/blog_details.html",{"article":article})
+    response["ETag"] = etag
+    # Always revalidate, the ETag makes that a cheap 304
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
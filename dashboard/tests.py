@@ -1,3 +1,125 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from profiles import analytics
+from profiles.models import AnalyticsWatermark, LinkClick, Profile, ProfileDailyStats, ProfileSection, ProfileView
+from profiles.rollups import WATERMARK_NAME, start_of_day
+
+from . import views
+
+
+class ExportAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="export@example.com", username="export")
+        self.user.subscription.plan_type = "MONTHLY"
+        self.user.subscription.save()
+        self.profile = Profile.objects.create(user=self.user, slug="export", full_name="Export")
+        self.section = ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS, title="Site", data={"url": "https://example.com"})
+
+        ProfileView.objects.create(profile=self.profile, ip_address="10.0.0.2", timestamp=datetime(2026, 3, 2, 9, 0, tzinfo=dt_timezone.utc))
+        ProfileView.objects.create(profile=self.profile, ip_address="10.0.0.1", timestamp=datetime(2026, 3, 1, 9, 0, tzinfo=dt_timezone.utc))
+        LinkClick.objects.create(profile_section=self.section, profile=self.profile, timestamp=datetime(2026, 3, 1, 10, 0, tzinfo=dt_timezone.utc))
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["active_profile_id"] = self.profile.id
+        session.save()
+
+    def export(self, **params):
+        response = self.client.get(reverse("dashboard:export"), params)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_is_streamed_in_timestamp_order(self):
+        response, body = self.export(type="views")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="export-views.csv"')
+        self.assertEqual(body.decode().splitlines(), [
+            "timestamp,ip_address",
+            "2026-03-01T09:00:00+00:00,10.0.0.1",
+            "2026-03-02T09:00:00+00:00,10.0.0.2",
+        ])
+
+    def test_ndjson_clicks(self):
+        response, body = self.export(type="clicks", format="ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([json.loads(line) for line in body.decode().splitlines()], [
+            {"timestamp": "2026-03-01T10:00:00+00:00", "section_id": self.section.id, "section_title": "Site"},
+        ])
+
+    def test_date_range_and_gzip(self):
+        response, body = self.export(type="views", start="2026-03-02", end="2026-03-02", gzip="1")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="export-views.csv.gz"')
+        self.assertEqual(gzip.decompress(body).decode().splitlines()[1:], ["2026-03-02T09:00:00+00:00,10.0.0.2"])
+
+    def test_bad_parameters_are_rejected(self):
+        self.assertEqual(self.client.get(reverse("dashboard:export"), {"type": "secrets"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("dashboard:export"), {"start": "yesterday"}).status_code, 400)
+
+    def test_free_plan_is_redirected(self):
+        self.user.subscription.plan_type = "FREE"
+        self.user.subscription.save()
+        response = self.client.get(reverse("dashboard:export"))
+        self.assertRedirects(response, reverse("profiles:subscription"), fetch_redirect_response=False)
+
+
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email="dash@example.com", username="dash")
+        self.profile = Profile.objects.create(user=self.user, slug="dash", full_name="Dash")
+        self.section = ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS, title="Site", data={"url": "https://example.com"})
+        self.today = timezone.localdate()
+
+        # Three days ago is closed: the rollup row counts, the raw rows behind it don't
+        closed_day = self.today - timedelta(days=3)
+        ProfileDailyStats.objects.create(profile=self.profile, date=closed_day, views=5, clicks=2, unique_visitors=4)
+        ProfileView.objects.create(profile=self.profile, ip_address="10.0.0.1", timestamp=start_of_day(closed_day))
+        AnalyticsWatermark.objects.create(name=WATERMARK_NAME, value=start_of_day(self.today - timedelta(days=1)))
+
+        ProfileView.objects.create(profile=self.profile, ip_address="10.0.0.1")
+        ProfileView.objects.create(profile=self.profile, ip_address="10.0.0.2")
+        LinkClick.objects.create(profile_section=self.section, profile=self.profile)
+
+    def test_metrics_are_one_query(self):
+        date_list = [self.today - timedelta(days=i) for i in range(6, -1, -1)]
+        boundary = self.today - timedelta(days=1)
+        with self.assertNumQueries(1):
+            metrics = views._metrics(self.profile, date_list, boundary)
+        self.assertEqual(metrics["rollup_views"] + metrics["raw_views"], 7)
+        self.assertEqual(metrics["rollup_clicks"] + metrics["raw_clicks"], 3)
+        self.assertEqual(metrics["section_count"], 1)
+        self.assertEqual([metrics[f"views_{index}"] for index in range(7)], [0, 0, 0, 5, 0, 0, 2])
+
+    def test_dashboard_totals(self):
+        data = views._build_dashboard(self.profile)
+        self.assertEqual(data["stats"], {"views": 7, "clicks": 3, "ctr": 42.9})
+        self.assertEqual((data["views_today"], data["clicks_today"]), (2, 1))
+        self.assertEqual(json.loads(data["chart_clicks"]), [0, 0, 0, 2, 0, 0, 1])
+
+    def test_payload_is_cached_until_new_events(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["active_profile_id"] = self.profile.id
+        session.save()
+
+        with mock.patch.object(views, "_build_dashboard", wraps=views._build_dashboard) as build:
+            self.client.get(reverse("dashboard:index"))
+            response = self.client.get(reverse("dashboard:index"))
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(response.context["stats"]["views"], 7)
 
-# Create your tests here.
+            with mock.patch.object(analytics, "BUFFERING", False):
+                analytics.record_link_click(self.section.id, self.profile.id)
+            response = self.client.get(reverse("dashboard:index"))
+            self.assertEqual(build.call_count, 2)
+            self.assertEqual(response.context["stats"]["clicks"], 4)
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import dashboard_view
+from .views import dashboard_view, export_analytics
 
 app_name = "dashboard"
 
 urlpatterns = [
     path("", dashboard_view, name="index"),
+    path("export/", export_analytics, name="export"),
 ]
@@ -1,63 +1,93 @@
 from django.shortcuts import render, redirect
-from profiles.models import Profile,LinkClick,ProfileView
-from django.db.models import Count
-from django.db.models.functions import TruncDate
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from profiles.models import Profile,ProfileSection,LinkClick,ProfileView,ProfileDailyStats
+from profiles.cache import dashboard_key, DASHBOARD_TIMEOUT
+from profiles.rollups import rollup_boundary, start_of_day
+from profiles.sketches import unique_visitors
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import timedelta,date
+from datetime import date, timedelta
+import csv
+import itertools
 import json
-
-def dashboard_view(request):
-    profile_id = request.session.get("active_profile_id")
-    profile = None
-    if profile_id:
-        profile = Profile.objects.filter(id=profile_id, user=request.user).first()
-
-    if not profile:
-        return redirect("profiles:list")
+import zlib
+
+def _scalar(queryset, aggregate):
+    """A correlated subquery returning one aggregate over `queryset` for the outer profile (0 if empty)."""
+    return Coalesce(
+        Subquery(queryset.filter(profile=OuterRef('pk')).order_by().values('profile').annotate(value=aggregate).values('value')),
+        0,
+    )
+
+def _metrics(profile, date_list, boundary):
+    """
+    Every count the dashboard needs, in ONE round trip: totals, the per-day
+    chart and the section count are scalar subqueries on the profile row.
+    Days before `boundary` come from the rollups, the rest from raw rows.
+    """
+    def count_between(model, start=None, end=None):
+        qs = model.objects.all()
+        if start:
+            qs = qs.filter(timestamp__gte=start)
+        if end:
+            qs = qs.filter(timestamp__lt=end)
+        return _scalar(qs, Count('id'))
+
+    rollups = ProfileDailyStats.objects.filter(date__lt=boundary) if boundary else ProfileDailyStats.objects.none()
+    open_from = start_of_day(boundary) if boundary else None
+
+    annotations = {
+        'rollup_views': _scalar(rollups, Sum('views')),
+        'rollup_clicks': _scalar(rollups, Sum('clicks')),
+        'raw_views': count_between(ProfileView, open_from),
+        'raw_clicks': count_between(LinkClick, open_from),
+        'section_count': _scalar(ProfileSection.objects.all(), Count('id')),
+    }
+    for index, day in enumerate(date_list):
+        if boundary and day < boundary:
+            annotations[f'views_{index}'] = _scalar(ProfileDailyStats.objects.filter(date=day), Sum('views'))
+            annotations[f'clicks_{index}'] = _scalar(ProfileDailyStats.objects.filter(date=day), Sum('clicks'))
+        else:
+            day_start, day_end = start_of_day(day), start_of_day(day + timedelta(days=1))
+            annotations[f'views_{index}'] = count_between(ProfileView, day_start, day_end)
+            annotations[f'clicks_{index}'] = count_between(LinkClick, day_start, day_end)
+
+    return Profile.objects.filter(pk=profile.pk).annotate(**annotations).values(*annotations).get()
+
+def _build_dashboard(profile):
+    # Closed days are read from the daily rollups, open days (today and anything
+    # the rollup job hasn't reached yet) are counted exactly from the raw rows
+    today = timezone.localdate()
+    date_list = [today - timedelta(days=i) for i in range(6, -1, -1)]
+    metrics = _metrics(profile, date_list, rollup_boundary())
 
     # --- 1. KEY METRICS ---
     stats = {
-        'views': ProfileView.objects.filter(profile=profile).count(),
-        'clicks': LinkClick.objects.filter(profile_section__profile=profile).count(),
+        'views': metrics['rollup_views'] + metrics['raw_views'],
+        'clicks': metrics['rollup_clicks'] + metrics['raw_clicks'],
         'ctr': 0
     }
     if stats['views'] > 0:
         stats['ctr'] = round((stats['clicks'] / stats['views']) * 100, 1)
 
     # --- 2. CHART DATA & DAILY TRENDS ---
-    today = timezone.now().date()
-    yesterday = today - timedelta(days=1)
-    
-    date_list = [today - timedelta(days=i) for i in range(6, -1, -1)]
-    
-    # Init dicts
-    daily_views = {date: 0 for date in date_list}
-    daily_clicks = {date: 0 for date in date_list}
-
-    # Query Views
-    views_qs = ProfileView.objects.filter(
-        profile=profile, timestamp__date__gte=date_list[0]
-    ).annotate(date=TruncDate('timestamp')).values('date').annotate(count=Count('id'))
-    
-    for entry in views_qs:
-        daily_views[entry['date']] = entry['count']
+    daily_views = [metrics[f'views_{index}'] for index in range(len(date_list))]
+    daily_clicks = [metrics[f'clicks_{index}'] for index in range(len(date_list))]
 
-    # Query Clicks
-    clicks_qs = LinkClick.objects.filter(
-        profile_section__profile=profile, timestamp__date__gte=date_list[0]
-    ).annotate(date=TruncDate('timestamp')).values('date').annotate(count=Count('id'))
+    # Calculate "Growth" (Today vs Yesterday)
+    views_today = daily_views[-1]
+    views_yesterday = daily_views[-2]
+    clicks_today = daily_clicks[-1]
 
-    for entry in clicks_qs:
-        daily_clicks[entry['date']] = entry['count']
+    # Approximate, merged from the per-day HyperLogLog sketches
+    unique_visitors_week = unique_visitors(profile, date_list[0], today)
 
-    # Calculate "Growth" (Today vs Yesterday)
-    views_today = daily_views.get(today, 0)
-    views_yesterday = daily_views.get(yesterday, 0)
-    
-    clicks_today = daily_clicks.get(today, 0)
-    
     # --- 3. RECENT ACTIVITY ---
-    recent_activity = ProfileView.objects.filter(profile=profile).order_by('-timestamp')[:5]
+    recent_activity = list(ProfileView.objects.filter(profile=profile).order_by('-timestamp')[:5])
 
     # --- 4. SMART PROFILE HEALTH CHECK ---
     # We build a list of missing items to show the user
@@ -74,12 +104,12 @@ def dashboard_view(request):
     else:
         missing_actions.append({'label': 'Write a Bio', 'points': 20, 'url': 'profiles:sections'})
 
-    if profile.sections.count() > 0: 
+    if metrics['section_count'] > 0: 
         score += 30
     else:
         missing_actions.append({'label': 'Add First Link/Section', 'points': 30, 'url': 'profiles:sections'})
 
-    if profile.theme: 
+    if profile.theme_id: 
         score += 10
     else:
         missing_actions.append({'label': 'Select a Theme', 'points': 10, 'url': 'profiles:themes'})
@@ -92,21 +122,129 @@ def dashboard_view(request):
     
     completion_score = min(score, 100)
 
-    data = {
-        'profile': profile,
+    return {
         'stats': stats,
         # Trend Data
         'views_today': views_today,
         'views_trend': views_today - views_yesterday, # Positive or negative number
         'clicks_today': clicks_today,
+        'unique_visitors_week': unique_visitors_week,
         # Health Data
         'completion_score': completion_score,
         'missing_actions': missing_actions,
         'recent_activity': recent_activity,
         # Chart JSON
-        'chart_labels': json.dumps([date.strftime("%a") for date in daily_views.keys()]),
-        'chart_views': json.dumps(list(daily_views.values())),
-        'chart_clicks': json.dumps(list(daily_clicks.values())),
+        'chart_labels': json.dumps([day.strftime("%a") for day in date_list]),
+        'chart_views': json.dumps(daily_views),
+        'chart_clicks': json.dumps(daily_clicks),
     }
 
-    return render(request, "dashboard/index.html", data)
+def dashboard_view(request):
+    profile_id = request.session.get("active_profile_id")
+    profile = None
+    if profile_id:
+        profile = Profile.objects.filter(id=profile_id, user=request.user).first()
+
+    if not profile:
+        return redirect("profiles:list")
+
+    # Cleared when analytics for this profile are flushed or the profile is edited
+    key = dashboard_key(profile.id)
+    data = cache.get(key)
+    if data is None:
+        data = _build_dashboard(profile)
+        cache.set(key, data, DASHBOARD_TIMEOUT)
+
+    return render(request, "dashboard/index.html", {'profile': profile, **data})
+
+
+# --- ANALYTICS EXPORT (Pro) ---
+
+EXPORT_CHUNK_SIZE = 2000
+
+class Echo:
+    """File-like object for csv.writer that hands the formatted line straight back."""
+    def write(self, value):
+        return value
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _batched(lines, size=64 * 1024):
+    # Join small lines into ~64KB pieces so the response isn't one write per row
+    buffer, length = [], 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+@login_required
+def export_analytics(request):
+    profile_id = request.session.get("active_profile_id")
+    profile = Profile.objects.filter(id=profile_id, user=request.user).first() if profile_id else None
+    if not profile:
+        return redirect("profiles:list")
+
+    subscription = getattr(request.user, 'subscription', None)
+    if not subscription or not subscription.is_pro:
+        messages.warning(request, "Analytics export is a Pro feature. Upgrade to download your data!")
+        return redirect("profiles:subscription")
+
+    kind = request.GET.get('type', 'views')
+    export_format = request.GET.get('format', 'csv')
+    if kind not in ('views', 'clicks') or export_format not in ('csv', 'ndjson'):
+        return HttpResponseBadRequest("Unknown export type or format")
+
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return HttpResponseBadRequest("Dates must be YYYY-MM-DD")
+
+    if kind == 'views':
+        qs = ProfileView.objects.filter(profile=profile)
+        columns = ['timestamp', 'ip_address']
+        headers = ['timestamp', 'ip_address']
+    else:
+        qs = LinkClick.objects.filter(profile=profile)
+        columns = ['timestamp', 'profile_section_id', 'profile_section__title']
+        headers = ['timestamp', 'section_id', 'section_title']
+    if start:
+        qs = qs.filter(timestamp__gte=start_of_day(start))
+    if end:
+        qs = qs.filter(timestamp__lt=start_of_day(end + timedelta(days=1)))
+
+    # .iterator() streams through a server-side cursor on PostgreSQL,
+    # only one chunk of rows is ever held in memory
+    rows = qs.order_by('timestamp').values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        lines = itertools.chain(
+            [writer.writerow(headers)],
+            (writer.writerow([row[0].isoformat(), *row[1:]]) for row in rows),
+        )
+        content_type = 'text/csv'
+    else:
+        lines = (json.dumps(dict(zip(headers, [row[0].isoformat(), *row[1:]]))) + "\n" for row in rows)
+        content_type = 'application/x-ndjson'
+
+    filename = f"{profile.slug}-{kind}.{export_format}"
+    stream = _batched(lines)
+    if request.GET.get('gzip') == '1':
+        stream = _gzip_stream(stream)
+        filename += ".gz"
+        content_type = 'application/gzip'
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,210 @@
+"""
+In-process ingestion buffer for analytics events.
+
+Public profile views and link clicks are queued in memory and written with
+bulk_create by a background thread, either when a batch fills up or every
+ANALYTICS_FLUSH_INTERVAL seconds. The queue is bounded: once it is full new
+events are dropped (and counted) instead of growing the worker's memory.
+Anything still queued is flushed when the worker shuts down. A batch with bad
+rows (integrity / data errors) is split until only those rows are dropped;
+any other database error puts the batch back in the queue for the next flush.
+
+Events can carry `extra` data that is not stored on the row but handed to
+the buffer's on_flush hook (e.g. the visitor key for the HyperLogLog sketches).
+"""
+import atexit
+import ipaddress
+import logging
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, connections
+from django.utils import timezone
+
+from .models import ProfileView, LinkClick
+from .sketches import add_visitors
+from .cache import invalidate_dashboards
+
+logger = logging.getLogger(__name__)
+
+BUFFERING = getattr(settings, "ANALYTICS_BUFFERING", True)
+MAX_PENDING = getattr(settings, "ANALYTICS_BUFFER_SIZE", 10000)
+BATCH_SIZE = getattr(settings, "ANALYTICS_BATCH_SIZE", 500)
+FLUSH_INTERVAL = getattr(settings, "ANALYTICS_FLUSH_INTERVAL", 5)
+
+
+class EventBuffer:
+    def __init__(self, model, on_flush=None, max_pending=MAX_PENDING, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.model = model
+        self.on_flush = on_flush
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.flushed = 0
+        self.dropped = 0
+
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+        self._worker_pid = None
+
+    def add(self, extra=None, **fields):
+        fields.setdefault("timestamp", timezone.now())
+
+        with self._lock:
+            if len(self._events) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._events.append((fields, extra))
+            pending = len(self._events)
+
+        if not BUFFERING:
+            self.flush()
+            return True
+
+        self._ensure_worker()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        # One flush at a time, so a shutdown flush never races the worker
+        with self._flush_lock:
+            with self._lock:
+                events = list(self._events)
+                self._events.clear()
+
+            if not events:
+                return 0
+
+            stored = []
+            try:
+                self._insert(events, stored)
+            except Exception:
+                # Not a bad row (database down, connection lost): keep the events for the next flush
+                stored_ids = {id(event) for event in stored}
+                remaining = [event for event in events if id(event) not in stored_ids]
+                logger.exception("%s bulk insert failed, requeued %d events", self.model.__name__, len(remaining))
+                self._requeue(remaining)
+
+            with self._lock:
+                self.flushed += len(stored)
+
+            if stored and self.on_flush:
+                try:
+                    self.on_flush(stored)
+                except Exception:
+                    logger.exception("%s on_flush hook failed", self.model.__name__)
+            return len(stored)
+
+    def _insert(self, events, stored):
+        """bulk_create `events` into `stored`, halving a batch with bad rows until only those are left out."""
+        try:
+            self.model.objects.bulk_create(
+                [self.model(**fields) for fields, _ in events],
+                batch_size=self.batch_size,
+            )
+            stored.extend(events)
+            return
+        except (IntegrityError, DataError):
+            if len(events) == 1:
+                # e.g. a click on a section deleted while its redirect was still cached
+                logger.warning("Dropping a %s event, insert failed", self.model.__name__, exc_info=True)
+                with self._lock:
+                    self.dropped += 1
+                return
+        middle = len(events) // 2
+        self._insert(events[:middle], stored)
+        self._insert(events[middle:], stored)
+
+    def _requeue(self, events):
+        # Back in front of anything queued meanwhile, still bounded by max_pending
+        with self._lock:
+            keep = events[:max(self.max_pending - len(self._events), 0)]
+            self._events.extendleft(reversed(keep))
+            self.dropped += len(events) - len(keep)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._events),
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+            }
+
+    def _ensure_worker(self):
+        # Threads don't survive fork(), so a pre-forked worker starts its own
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            self._worker_pid = pid
+            self._worker = threading.Thread(
+                target=self._run,
+                name=f"analytics-{self.model.__name__}",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            # This thread holds its own DB connection, don't keep it open between batches
+            connections.close_all()
+
+
+def _profile_views_flushed(events):
+    add_visitors((fields["profile_id"], fields["timestamp"], extra["visitor"]) for fields, extra in events)
+    invalidate_dashboards(fields["profile_id"] for fields, _ in events)
+
+
+def _link_clicks_flushed(events):
+    invalidate_dashboards(fields["profile_id"] for fields, _ in events)
+
+
+profile_views = EventBuffer(ProfileView, on_flush=_profile_views_flushed)
+link_clicks = EventBuffer(LinkClick, on_flush=_link_clicks_flushed)
+
+
+def _normalize_ip(value):
+    """The canonical form of `value`, or None if it isn't an IP address (a spoofed X-Forwarded-For)."""
+    try:
+        return str(ipaddress.ip_address((value or "").strip()))
+    except ValueError:
+        return None
+
+
+def record_profile_view(profile_id, ip_address, user_agent=""):
+    return profile_views.add(
+        extra={"visitor": f"{ip_address}|{user_agent}"},
+        profile_id=profile_id,
+        ip_address=_normalize_ip(ip_address),
+    )
+
+
+def record_link_click(section_id, profile_id):
+    return link_clicks.add(profile_section_id=section_id, profile_id=profile_id)
+
+
+def flush_all():
+    return profile_views.flush() + link_clicks.flush()
+
+
+def stats():
+    return {
+        "profile_views": profile_views.stats(),
+        "link_clicks": link_clicks.stats(),
+    }
+
+
+# Gunicorn workers exit normally on SIGTERM / max_requests, so this runs
+atexit.register(flush_all)
@@ -0,0 +1,108 @@
+"""
+Bot / crawler classification for analytics.
+
+The bundled lists in profiles/data/ are compiled ONCE at import: user-agent
+markers into a single regex (literal markers folded into a prefix trie, so
+the engine does not try ~90 alternatives at every position of the header),
+IP networks into sorted integer ranges searched with bisect. Classifying a
+request is one regex search on the lowercased header plus one binary
+search; bot traffic is only counted in memory.
+"""
+import bisect
+import ipaddress
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+
+def _read_lines(name):
+    lines = []
+    for line in (DATA_DIR / name).read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            lines.append(line)
+    return lines
+
+
+def _trie_pattern(words):
+    """Regex matching any of `words`, with shared prefixes factored out."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return build(trie)
+
+
+def _compile_user_agents(lines):
+    # Matched against the lowercased header, so no IGNORECASE needed
+    literals = [line.lower() for line in lines if not line.startswith("re:")]
+    fragments = [line[3:] for line in lines if line.startswith("re:")]
+    return re.compile("|".join([_trie_pattern(literals)] + [f"(?:{fragment})" for fragment in fragments]))
+
+
+def _compile_networks(cidrs):
+    """Merged, sorted (start, end) integer ranges per IP version."""
+    ranges = {4: [], 6: []}
+    for cidr in cidrs:
+        network = ipaddress.ip_network(cidr, strict=False)
+        ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+
+    compiled = {}
+    for version, spans in ranges.items():
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        compiled[version] = ([start for start, _ in merged], [end for _, end in merged])
+    return compiled
+
+
+USER_AGENT_RE = _compile_user_agents(_read_lines("bot_user_agents.txt"))
+NETWORKS = _compile_networks(_read_lines("bot_ip_ranges.txt"))
+
+
+def is_bot_ip(ip_address):
+    try:
+        address = ipaddress.ip_address((ip_address or "").strip())
+    except ValueError:
+        return False
+    starts, ends = NETWORKS[address.version]
+    value = int(address)
+    index = bisect.bisect_right(starts, value) - 1
+    return index >= 0 and value <= ends[index]
+
+
+def is_bot(user_agent, ip_address):
+    return USER_AGENT_RE.search((user_agent or "").lower()) is not None or is_bot_ip(ip_address)
+
+
+# In-memory tally of bot hits per event type ("view" / "click") for this worker
+_hits = Counter()
+_lock = threading.Lock()
+
+
+def count_hit(kind):
+    with _lock:
+        _hits[kind] += 1
+
+
+def stats():
+    with _lock:
+        return dict(_hits)
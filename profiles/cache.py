@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.core.cache import cache
+
+# How long a rendered public profile stays in the cache. Signals clear it
+# as soon as anything on the page changes, the timeout is only a safety net.
+PAGE_TIMEOUT = getattr(settings, "PROFILE_PAGE_CACHE_TIMEOUT", 60 * 60)
+
+# The assembled owner dashboard is only cached briefly, analytics flushes and
+# profile edits clear it anyway
+DASHBOARD_TIMEOUT = getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60)
+
+# Rendered section blocks. Their keys change with every edit, so they are
+# never invalidated, only left to expire
+SECTION_TIMEOUT = getattr(settings, "SECTION_FRAGMENT_CACHE_TIMEOUT", 24 * 60 * 60)
+
+# Name used for profiles without a theme (they fall back to modern.html)
+DEFAULT_THEME = "default"
+
+
+def _pointer_key(username, slug):
+    return f"profiles:public:{username}:{slug}"
+
+
+def _page_key(username, slug, theme):
+    return f"profiles:page:{username}:{slug}:{theme}"
+
+
+def _index_key(profile_id):
+    # Every key written for a profile is listed here so invalidation also
+    # clears URLs the profile no longer answers to (renamed slug / username)
+    return f"profiles:keys:{profile_id}"
+
+
+def get_cached_page(username, slug):
+    """
+    Returns (profile_id, html) for a cached public profile, or None.
+    Only touches the cache, never the database.
+    """
+    pointer = cache.get(_pointer_key(username, slug))
+    if not pointer:
+        return None
+
+    html = cache.get(_page_key(username, slug, pointer["theme"]))
+    if html is None:
+        return None
+    return pointer["profile_id"], html
+
+
+def _remember(profile_id, values):
+    """Cache `values` and list their keys in the profile's index."""
+    index_key = _index_key(profile_id)
+    keys = set(cache.get(index_key, []))
+    keys.update(values)
+
+    cache.set_many(values, PAGE_TIMEOUT)
+    cache.set(index_key, list(keys), PAGE_TIMEOUT)
+
+
+def cache_page(profile, username, slug, theme, html):
+    _remember(profile.id, {
+        _pointer_key(username, slug): {"profile_id": profile.id, "theme": theme},
+        _page_key(username, slug, theme): html,
+    })
+
+
+def _card_key(profile_id):
+    return f"profiles:card:{profile_id}"
+
+
+def get_cached_cards(profile_ids):
+    """Returns {profile_id: html} for the showcase cards already in the cache."""
+    found = cache.get_many([_card_key(profile_id) for profile_id in profile_ids])
+    return {profile_id: found[_card_key(profile_id)] for profile_id in profile_ids if _card_key(profile_id) in found}
+
+
+def cache_card(profile_id, html):
+    # Listed in the profile's index, so the same signals that clear the
+    # public page (profile, user details, theme edits) clear the card too
+    _remember(profile_id, {_card_key(profile_id): html})
+
+
+def section_fragment_key(section, theme, version):
+    """
+    Cache key of one rendered section block: the section's id and last edit,
+    the theme and a digest of the block's template code. Takes a section or
+    its render document dict. None for unsaved / mock sections (theme
+    previews), which are always rendered.
+    """
+    if isinstance(section, dict):
+        section_id, stamp = section.get("id"), section.get("updated_at")
+    else:
+        updated_at = getattr(section, "updated_at", None)
+        section_id = getattr(section, "pk", None)
+        stamp = int(updated_at.timestamp() * 1_000_000) if updated_at else None
+    if not section_id or stamp is None:
+        return None
+    return f"profiles:section:{section_id}:{stamp}:{theme}:{version}"
+
+
+def invalidate_profile(profile_id):
+    index_key = _index_key(profile_id)
+    keys = cache.get(index_key, [])
+    cache.delete_many(list(keys) + [index_key])
+
+
+def invalidate_profiles(profile_ids):
+    for profile_id in profile_ids:
+        invalidate_profile(profile_id)
+
+
+def dashboard_key(profile_id):
+    return f"dashboard:payload:{profile_id}"
+
+
+def invalidate_dashboards(profile_ids):
+    cache.delete_many([dashboard_key(profile_id) for profile_id in set(profile_ids)])
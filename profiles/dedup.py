@@ -0,0 +1,130 @@
+"""
+Session-free de-duplication of public profile views.
+
+A visitor is identified by a hash of (profile, ip, user agent) and remembered
+in a rotating, time-windowed Bloom filter: one fixed size bit array per window
+slot (wall clock time // PROFILE_VIEW_DEDUP_WINDOW), checked against the
+current and the previous slot. A visitor is remembered from their view until
+the end of the next slot, between one and two windows, and memory never grows
+beyond the two bit arrays.
+
+With the Redis cache the bit arrays are Redis bitmaps (SETBIT / GETBIT in one
+MULTI), shared by every worker, so a visitor is counted once whatever worker
+their requests land on; each slot's key expires after two windows. Other
+cache backends can't hold a bitmap, and each worker then keeps its own
+filters: a visitor is counted at most once per worker. A false positive only
+means a view is not counted, the rate is bounded by
+PROFILE_VIEW_DEDUP_ERROR_RATE.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+WINDOW = getattr(settings, "PROFILE_VIEW_DEDUP_WINDOW", 30 * 60)
+CAPACITY = getattr(settings, "PROFILE_VIEW_DEDUP_CAPACITY", 100000)
+ERROR_RATE = getattr(settings, "PROFILE_VIEW_DEDUP_ERROR_RATE", 0.001)
+
+_SLOT_KEY = "views:seen:{}"
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        # Standard sizing: m = -n ln(p) / ln(2)^2, k = m/n ln(2)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, digest):
+        # Kirsch-Mitzenmacher double hashing from one 128 bit digest
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, digest):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+    def add(self, digest):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+
+def _redis_client():
+    """The shared cache's redis client, or None for other cache backends."""
+    get_client = getattr(getattr(cache, "_cache", None), "get_client", None)
+    return get_client(write=True) if get_client else None
+
+
+class RecentVisitors:
+    def __init__(self, window=WINDOW, capacity=CAPACITY, error_rate=ERROR_RATE):
+        self.window = window
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._slot = self._slot_at(time.time())
+
+    def _slot_at(self, now):
+        # Wall clock, so every worker (and Redis) agrees on the slot boundaries
+        return int(now // self.window)
+
+    def _rotate(self, slot):
+        if slot == self._slot:
+            return
+        # More than one slot idle: nothing in either filter is still valid
+        self._previous = self._current if slot == self._slot + 1 else BloomFilter(self.capacity, self.error_rate)
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._slot = slot
+
+    def _seen_local(self, digest, slot):
+        with self._lock:
+            self._rotate(slot)
+            if digest in self._current or digest in self._previous:
+                return True
+            self._current.add(digest)
+            return False
+
+    def _seen_shared(self, client, digest, slot):
+        positions = self._current._positions(digest)
+        current_key = cache.make_key(_SLOT_KEY.format(slot))
+        previous_key = cache.make_key(_SLOT_KEY.format(slot - 1))
+        # MULTI: of two workers setting the same bits, only one sees them all clear
+        pipe = client.pipeline(transaction=True)
+        for position in positions:
+            pipe.getbit(previous_key, position)
+        for position in positions:
+            pipe.setbit(current_key, position, 1)
+        pipe.expire(current_key, 2 * self.window)
+        results = pipe.execute()
+        in_previous, in_current = results[:len(positions)], results[len(positions):2 * len(positions)]
+        return all(in_previous) or all(in_current)
+
+    def seen(self, profile_id, ip_address, user_agent):
+        """
+        Returns True if this visitor already viewed the profile within the
+        window, otherwise remembers them and returns False.
+        """
+        digest = hashlib.blake2b(
+            f"{profile_id}|{ip_address}|{user_agent}".encode(),
+            digest_size=16,
+        ).digest()
+        slot = self._slot_at(time.time())
+
+        client = _redis_client()
+        if client is not None:
+            try:
+                return self._seen_shared(client, digest, slot)
+            except Exception:
+                # Redis down: this worker's filter rather than failing the view
+                logger.exception("Shared view de-duplication failed")
+        return self._seen_local(digest, slot)
+
+
+recent_visitors = RecentVisitors()
@@ -0,0 +1,165 @@
+"""
+First-party favicons for LINKS sections.
+
+Instead of every visitor's browser asking a third party for one icon per
+link, {% favicon_url %} points at our own /profile/favicon/<domain>/
+endpoint. Icons are fetched once per domain through FAVICON_FETCHER,
+kept in the default storage under favicons/ and in the cache, and
+refetched after FAVICON_TTL. Domains without an icon are remembered for
+an hour so they aren't refetched on every view. Only domains some LINKS
+section points at (ProfileSection.link_domain, set on save) are fetched,
+so the endpoint can't be used to make us request arbitrary hosts.
+
+The fetcher is a dotted path to a callable taking a domain and returning
+the icon bytes (or None); tests can point it at a local stub.
+"""
+import hashlib
+import logging
+import re
+import time
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.module_loading import import_string
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+TTL = getattr(settings, "FAVICON_TTL", 7 * 24 * 60 * 60)
+FETCHER = getattr(settings, "FAVICON_FETCHER", "profiles.favicons.fetch_from_google")
+MISSING_TIMEOUT = 60 * 60
+MAX_BYTES = 100 * 1024
+PREFIX = "favicons/"
+
+FORMATS = {"PNG": "image/png", "ICO": "image/x-icon", "GIF": "image/gif", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+DOMAIN_RE = re.compile(r"^(?=.{4,253}$)([a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$")
+
+
+def domain_for(url):
+    """The normalized host of a link URL, or None if it isn't a public domain name."""
+    if not url:
+        return None
+    if "//" not in url:
+        url = "//" + url
+    try:
+        host = (urlsplit(url).hostname or "").rstrip(".")
+        host = host.encode("idna").decode("ascii").lower()
+    except (ValueError, UnicodeError):
+        return None
+    return host if DOMAIN_RE.match(host) else None
+
+
+def fetch_from_google(domain):
+    """Default fetcher: Google's favicon service, requested from the server instead of the browser."""
+    try:
+        # Streamed: closing the response releases the connection without reading an oversized body
+        with requests.get(
+            "https://www.google.com/s2/favicons", params={"domain": domain, "sz": 64}, timeout=3, stream=True
+        ) as response:
+            if response.status_code != 200:
+                return None
+            body = response.raw.read(MAX_BYTES + 1, decode_content=True)
+    except requests.RequestException:
+        return None
+    return body if len(body) <= MAX_BYTES else None
+
+
+def _image_format(body):
+    try:
+        with Image.open(BytesIO(body)) as image:
+            if image.format in FORMATS and max(image.size) <= 512:
+                return image.format
+    except (OSError, Image.DecompressionBombError):
+        pass
+    return None
+
+
+def _cache_key(domain):
+    return f"favicons:{domain}"
+
+
+def _remember(domain, body, expires):
+    image_format = _image_format(body) if body else None
+    if image_format is None:
+        return None
+    entry = {
+        "body": body,
+        "content_type": FORMATS[image_format],
+        "etag": '"%s"' % hashlib.md5(body).hexdigest(),
+        "expires": expires,
+    }
+    # Outlives `expires`: a stale icon is still served while a refetch fails
+    cache.set(_cache_key(domain), entry, TTL * 2)
+    return entry
+
+
+def _load_stored(domain):
+    """The stored icon if it is still within its TTL."""
+    name = f"{PREFIX}{domain}"
+    try:
+        if not default_storage.exists(name):
+            return None
+        fetched_at = default_storage.get_modified_time(name).timestamp()
+        if fetched_at + TTL < time.time():
+            return None
+        with default_storage.open(name) as handle:
+            body = handle.read(MAX_BYTES + 1)
+    except Exception:
+        logger.exception("Could not read stored favicon for %s", domain)
+        return None
+    return _remember(domain, body, fetched_at + TTL)
+
+
+def _fetch(domain):
+    try:
+        body = import_string(FETCHER)(domain)
+    except Exception:
+        logger.exception("Favicon fetcher failed for %s", domain)
+        return None
+    entry = _remember(domain, body, time.time() + TTL)
+    if entry is None:
+        return None
+    name = f"{PREFIX}{domain}"
+    try:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(body))
+    except Exception:
+        logger.exception("Could not store favicon for %s", domain)
+    return entry
+
+
+def is_linked(domain):
+    """True if some LINKS section points at `domain`."""
+    from .models import ProfileSection  # models imports domain_for from here
+
+    return ProfileSection.objects.filter(section_type=ProfileSection.LINKS, link_domain=domain).exists()
+
+
+def get_favicon(domain):
+    """
+    Returns {"body", "content_type", "etag"} for `domain`, or None if it has no
+    usable icon or no LINKS section links to it.
+    """
+    if not is_linked(domain):
+        return None
+    entry = cache.get(_cache_key(domain))
+    if entry is not None and entry["expires"] > time.time():
+        return entry if entry.get("body") else None
+
+    fresh = _load_stored(domain) or _fetch(domain)
+    if fresh is not None:
+        return fresh
+    if entry and entry.get("body"):
+        # Refetch failed: keep serving the old icon, retry later
+        entry["expires"] = time.time() + MISSING_TIMEOUT
+        cache.set(_cache_key(domain), entry, TTL)
+        return entry
+    cache.set(_cache_key(domain), {"expires": time.time() + MISSING_TIMEOUT}, MISSING_TIMEOUT)
+    return None
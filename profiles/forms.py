@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
+from accounts.models import validate_image_size, validate_image_pixels
 from .models import ProfileSection, Profile,Feedback
 
 User = get_user_model()
@@ -66,8 +67,10 @@ class ProfileSectionForm(forms.ModelForm):
         label="Proficiency"
     )
 
-    profile_image = forms.ImageField(required=False,label="Profile Photo",
+    profile_image = forms.ImageField(required=False,label="Profile Photo",validators=[validate_image_size,validate_image_pixels],
         widget=forms.FileInput(attrs={'class': 'hidden', 'id': 'id_profile_image'}))
+    # Token of a direct-to-bucket upload (see accounts/uploads.py), sent instead of the file
+    profile_image_key = forms.CharField(required=False, widget=forms.HiddenInput)
 
     # --- 5. Personal Details Fields (UPDATED) ---
     phone = forms.CharField(required=False, label="Phone Number", max_length=50)
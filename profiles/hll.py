@@ -0,0 +1,64 @@
+"""
+HyperLogLog sketch for approximate distinct counts (unique visitors).
+
+With the default precision of 12 a sketch is 4096 one-byte registers (4 KB)
+and estimates cardinality with ~1.6% standard error. Sketches merge by taking
+the register-wise maximum, so per-day sketches can be combined into any
+date range without touching the raw rows.
+"""
+import hashlib
+import math
+
+PRECISION = 12
+
+
+class HyperLogLog:
+    def __init__(self, registers=None, precision=PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.size)
+        else:
+            if len(registers) != self.size:
+                raise ValueError(f"Expected {self.size} registers, got {len(registers)}")
+            self.registers = bytearray(registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(registers=bytes(data), precision=len(data).bit_length() - 1)
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add(self, value):
+        if isinstance(value, str):
+            value = value.encode()
+        hashed = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1-bit in the remaining (64 - p) bits
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        # Small range correction: linear counting while registers are still empty
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
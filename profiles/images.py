@@ -0,0 +1,175 @@
+"""
+Resized derivatives of uploaded images (avatars, theme and blog thumbnails).
+
+After an upload is committed, a small background pool renders every width
+in IMAGE_VARIANT_WIDTHS as WebP and JPEG and saves them beside the original
+through the default storage:
+
+    profile_images/me.png -> profile_images/me__w160.webp, me__w160.jpg, ...
+
+The widths that exist are remembered in the cache; the {% responsive_image %}
+tag reads that entry to build srcset and keeps serving the original while it
+is missing. A missing entry (evicted cache) schedules a check that
+regenerates whatever isn't in storage yet. A new upload always regenerates:
+with S3 file_overwrite a re-upload keeps its name, and the variants stored
+beside it are the old image's.
+"""
+import logging
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from accounts.images import was_uploaded
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = tuple(getattr(settings, "IMAGE_VARIANT_WIDTHS", (160, 320, 640)))
+WORKERS = getattr(settings, "IMAGE_VARIANT_WORKERS", 2)
+FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}), "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+
+# How long a "no variants" answer is trusted before storage is checked again
+MISSING_TIMEOUT = 5 * 60
+
+
+def variant_name(name, width, extension):
+    root, _ = posixpath.splitext(name)
+    return f"{root}__w{width}.{extension}"
+
+
+def is_variant(name):
+    root, _ = posixpath.splitext(name)
+    return any(root.endswith(f"__w{width}") for width in WIDTHS)
+
+
+def _cache_key(name):
+    return f"images:variants:{name}"
+
+
+def available_widths(name):
+    """Widths with stored variants, [] if there are none, None if unknown."""
+    return cache.get(_cache_key(name))
+
+
+def generate_variants(name, storage=default_storage):
+    """Render and save every variant narrower than the original. Returns the widths written."""
+    with storage.open(name) as handle:
+        image = Image.open(handle)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    widths = [width for width in WIDTHS if width < image.width]
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+
+        for extension, (image_format, options) in FORMATS.items():
+            frame = resized
+            if image_format == "JPEG" and frame.mode != "RGB":
+                frame = frame.convert("RGB")
+            elif frame.mode not in ("RGB", "RGBA"):
+                frame = frame.convert("RGBA")
+
+            buffer = BytesIO()
+            frame.save(buffer, image_format, **options)
+            target = variant_name(name, width, extension)
+            # save() would pick a new name next to an existing file
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+    return widths
+
+
+def ensure_variants(name, on_ready=None, force=False):
+    """Generate the variants that are missing from storage (all of them with `force`) and cache the result."""
+    try:
+        with default_storage.open(name) as handle:
+            original_width = Image.open(handle).width
+        expected = [width for width in WIDTHS if width < original_width]
+        if not force and all(default_storage.exists(variant_name(name, width, extension)) for width in expected for extension in FORMATS):
+            widths = expected
+        else:
+            widths = generate_variants(name)
+    except Exception:
+        logger.exception("Could not build image variants for %s", name)
+        cache.set(_cache_key(name), [], MISSING_TIMEOUT)
+        return
+    finally:
+        _pending.discard(name)
+
+    cache.set(_cache_key(name), widths, None)
+    if on_ready:
+        try:
+            on_ready()
+        except Exception:
+            logger.exception("on_ready hook failed for %s", name)
+
+
+# --- Background pool ---
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+_pending = set()
+
+
+def _get_executor():
+    # Like the analytics buffer: threads don't survive fork(), start a pool per worker
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="image-variants")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _submit(name, on_ready=None, force=False):
+    with _lock:
+        # A pending check may already have seen the old variants, a forced run still goes
+        if name in _pending and not force:
+            return
+        _pending.add(name)
+    _get_executor().submit(_run, name, on_ready, force)
+
+
+def _run(name, on_ready, force=False):
+    try:
+        ensure_variants(name, on_ready, force)
+    finally:
+        # on_ready hooks may query, don't leave the pool thread's connection open
+        connections.close_all()
+
+
+def schedule_variants(name, on_ready=None, replaced=False):
+    """
+    Build the variants of `name` off the request thread once the save is
+    committed. A known name is done unless its content was `replaced`: the
+    storage may overwrite a name in place, so the cached widths and the
+    stored variants are dropped and rebuilt.
+    """
+    if not name or is_variant(name):
+        return
+    if replaced:
+        cache.delete(_cache_key(name))
+    elif available_widths(name) is not None:
+        return
+    transaction.on_commit(lambda: _submit(name, on_ready, force=replaced))
+
+
+def schedule_field_variants(field_file, on_ready=None):
+    """schedule_variants for a model's image field, rebuilding if it was just uploaded."""
+    schedule_variants(field_file.name, on_ready, replaced=was_uploaded(field_file))
+
+
+def request_variants(name):
+    """Called on a cache miss while rendering: check / rebuild in the background."""
+    if name and not is_variant(name):
+        _submit(name)
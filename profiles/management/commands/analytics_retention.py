@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from profiles.retention import add_months, month_start, ensure_partitions, is_partitioned, prune_before
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming ProfileView partitions (PostgreSQL) and compact raw analytics older than the "
+        "retention period into the daily rollups. Run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            default=getattr(settings, "ANALYTICS_RETENTION_MONTHS", 13),
+            help="Whole months of raw rows to keep, including the current one.",
+        )
+        parser.add_argument("--months-ahead", type=int, default=3, help="Partitions to create in advance.")
+        parser.add_argument("--dry-run", action="store_true", help="Only print what would be done.")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        if is_partitioned():
+            if dry_run:
+                self.stdout.write(f"Would create partitions up to {options['months_ahead']} months ahead.")
+            else:
+                for name in ensure_partitions(options["months_ahead"]):
+                    self.stdout.write(f"Created partition {name}")
+
+        cutoff = add_months(month_start(timezone.localdate()), 1 - options["keep_months"])
+        for action in prune_before(cutoff, dry_run=dry_run):
+            self.stdout.write(("[dry-run] " if dry_run else "") + action)
+
+        self.stdout.write(self.style.SUCCESS(f"Raw analytics kept from {cutoff} onwards."))
@@ -0,0 +1,143 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.models import User
+from profiles.models import Profile, ProfileSection, ProfileView, LinkClick
+
+BENCH_EMAIL = "bench-analytics@biostack.local"
+COMPOSITE_INDEXES = ("profileview_profile_ts_idx", "linkclick_profile_ts_idx")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large ProfileView / LinkClick dataset and print the query plans and timings of the "
+        "dashboard analytics queries before (join, no composite index) and after (profile FK + "
+        "(profile, timestamp) index)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000_000, help="Rows to seed in EACH analytics table.")
+        parser.add_argument("--profiles", type=int, default=1000, help="Number of profiles the rows are spread over.")
+        parser.add_argument("--days", type=int, default=365, help="Spread the timestamps over this many days.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timing runs per query.")
+        parser.add_argument("--skip-seed", action="store_true", help="Reuse the dataset from a previous run.")
+        parser.add_argument("--clear", action="store_true", help="Delete the benchmark dataset and exit.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            User.objects.filter(email=BENCH_EMAIL).delete()
+            self.stdout.write("Benchmark data removed.")
+            return
+
+        if not options["skip_seed"]:
+            self.seed(options["rows"], options["profiles"], options["days"])
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        profile = Profile.objects.filter(user__email=BENCH_EMAIL).order_by("id").first()
+        if profile is None:
+            self.stderr.write("No benchmark data, run without --skip-seed first.")
+            return
+        since = timezone.now() - timedelta(days=7)
+
+        before = {
+            "views (7 days)": ProfileView.objects.filter(profile=profile, timestamp__gte=since),
+            "clicks total": LinkClick.objects.filter(profile_section__profile=profile),
+            "clicks (7 days)": LinkClick.objects.filter(profile_section__profile=profile, timestamp__gte=since),
+        }
+        after = {
+            "views (7 days)": ProfileView.objects.filter(profile=profile, timestamp__gte=since),
+            "clicks total": LinkClick.objects.filter(profile=profile),
+            "clicks (7 days)": LinkClick.objects.filter(profile=profile, timestamp__gte=since),
+        }
+
+        # DDL is transactional on PostgreSQL and SQLite: drop the composite
+        # indexes, measure, then roll the drop back
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index_name in COMPOSITE_INDEXES:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index_name)}")
+            self.report("BEFORE (join through ProfileSection, no composite index)", before, options["repeat"])
+            transaction.set_rollback(True)
+
+        self.report("AFTER (LinkClick.profile + (profile, timestamp) indexes)", after, options["repeat"])
+
+    def seed(self, rows, profile_count, days):
+        User.objects.filter(email=BENCH_EMAIL).delete()
+        user = User.objects.create_user(email=BENCH_EMAIL, username="bench-analytics", password=None)
+
+        profiles = Profile.objects.bulk_create(
+            [Profile(user=user, full_name=f"Bench {i}", slug=f"bench-{i}", visibility=Profile.PUBLIC) for i in range(profile_count)]
+        )
+        sections = ProfileSection.objects.bulk_create(
+            [
+                ProfileSection(profile=profile, section_type=ProfileSection.LINKS, title=f"Link {n}", data={"url": "https://example.com"})
+                for profile in profiles
+                for n in range(5)
+            ]
+        )
+        profile_ids = [profile.id for profile in profiles]
+        section_pairs = [(section.id, section.profile_id) for section in sections]
+
+        self.stdout.write(f"Seeding {rows:,} views and {rows:,} clicks over {profile_count} profiles...")
+        started = time.perf_counter()
+        now = timezone.now()
+        span = days * 24 * 3600
+        batch = 10000
+
+        for offset in range(0, rows, batch):
+            size = min(batch, rows - offset)
+            ProfileView.objects.bulk_create(
+                [
+                    ProfileView(
+                        profile_id=random.choice(profile_ids),
+                        ip_address=f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}",
+                        timestamp=now - timedelta(seconds=random.randint(0, span)),
+                    )
+                    for _ in range(size)
+                ]
+            )
+            clicks = []
+            for _ in range(size):
+                section_id, profile_id = random.choice(section_pairs)
+                clicks.append(LinkClick(profile_section_id=section_id, profile_id=profile_id, timestamp=now - timedelta(seconds=random.randint(0, span))))
+            LinkClick.objects.bulk_create(clicks)
+
+            if (offset // batch) % 100 == 0:
+                self.stdout.write(f"  {offset + size:,} / {rows:,}")
+
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    def report(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {title} =="))
+        explain_options = {"analyze": True} if connection.vendor == "postgresql" else {}
+
+        for label, qs in queries.items():
+            self.stdout.write(self.style.MIGRATE_LABEL(f"\n-- {label}"))
+
+            self.stdout.write("filter:")
+            self.stdout.write(qs.explain(**explain_options))
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                qs.count()
+                timings.append((time.perf_counter() - started) * 1000)
+
+            daily = qs.annotate(date=TruncDate("timestamp")).values("date").annotate(count=Count("id")).order_by()
+            self.stdout.write("daily group-by:")
+            self.stdout.write(daily.explain(**explain_options))
+            daily_timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(daily.all())
+                daily_timings.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(f"count(): best {min(timings):.2f} ms, daily group-by: best {min(daily_timings):.2f} ms")
@@ -0,0 +1,37 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from profiles import bots
+
+SAMPLES = [
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36", "203.0.113.7"),
+    ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1", "2001:db8::1"),
+    ("Mozilla/5.0 (Linux; Android 12; Cubot X19) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Mobile Safari/537.36", "198.51.100.20"),
+    ("Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)", "66.249.66.1"),
+    ("facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)", "69.63.180.3"),
+    ("WhatsApp/2.23.20.0", "157.240.1.1"),
+    ("Mozilla/5.0+(compatible; UptimeRobot/2.0; http://www.uptimerobot.com/)", "216.144.248.20"),
+    ("curl/8.4.0", "192.0.2.1"),
+]
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark the per-request cost of bots.is_bot() on typical browser and bot requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=100000, help="Calls per sample.")
+
+    def handle(self, *args, **options):
+        number = options["number"]
+        self.stdout.write(f"{'class':<7} {'ns/call':>9}  user agent")
+
+        for user_agent, ip_address in SAMPLES:
+            seconds = min(timeit.repeat(lambda: bots.is_bot(user_agent, ip_address), number=number, repeat=3))
+            label = "bot" if bots.is_bot(user_agent, ip_address) else "human"
+            self.stdout.write(f"{label:<7} {seconds / number * 1e9:>9.0f}  {user_agent[:70]}")
+
+        self.stdout.write(
+            f"\nPatterns compiled once at import: 1 regex, "
+            f"{sum(len(starts) for starts, _ in bots.NETWORKS.values())} merged IP ranges."
+        )
@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.models import User
+from profiles import search
+from profiles.models import Profile, ProfileSection
+
+BENCH_EMAIL = "bench-search@biostack.local"
+
+FIRST_NAMES = ["alex", "maria", "rahul", "priya", "chen", "fatima", "lucas", "sofia", "omar", "yuki", "ivan", "amara"]
+LAST_NAMES = ["sharma", "garcia", "smith", "kim", "nguyen", "okafor", "rossi", "silva", "tanaka", "novak", "haddad"]
+WORDS = [
+    "designer", "developer", "photographer", "writer", "founder", "engineer", "artist", "musician", "marketer",
+    "consultant", "teacher", "student", "researcher", "creator", "freelance", "product", "startup", "open", "source",
+    "mobile", "cloud", "data", "security", "gaming", "fitness", "travel", "food", "fashion", "finance", "health",
+]
+SKILLS = ["python", "django", "react", "figma", "rust", "golang", "kubernetes", "swift", "kotlin", "sql", "tensorflow", "blender"]
+
+QUERIES = ["python", "alex", "designer", "rahul developer", "dja", "kubernetes founder", "tanaka swift cloud", "zzzz"]
+
+
+class Command(BaseCommand):
+    help = "Seed profiles with searchable text, build the search index and time typical search queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", type=int, default=1_000_000, help="Profiles to seed.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timing runs per query.")
+        parser.add_argument("--skip-seed", action="store_true", help="Reuse the dataset from a previous run.")
+        parser.add_argument("--clear", action="store_true", help="Delete the benchmark dataset and exit.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            User.objects.filter(email=BENCH_EMAIL).delete()
+            self.stdout.write("Benchmark data removed.")
+            return
+
+        if not options["skip_seed"]:
+            self.seed(options["profiles"])
+
+        started = time.perf_counter()
+        indexed = search.rebuild()
+        self.stdout.write(f"Indexed {indexed:,} profiles in {time.perf_counter() - started:.1f}s ({connection.vendor})")
+
+        if search.use_postgres():
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE profiles_profile")
+
+        self.stdout.write(f"\n{'query':<22} {'hits':>5} {'best ms':>9} {'median ms':>10}")
+        for query in QUERIES:
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                ids = search.search_profiles(query)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(f"{query:<22} {len(ids):>5} {min(timings):>9.2f} {statistics.median(timings):>10.2f}")
+
+    def seed(self, count):
+        User.objects.filter(email=BENCH_EMAIL).delete()
+        user = User.objects.create_user(email=BENCH_EMAIL, username="bench-search", password=None)
+
+        self.stdout.write(f"Seeding {count:,} profiles...")
+        started = time.perf_counter()
+        batch = 10000
+        for offset in range(0, count, batch):
+            profiles = Profile.objects.bulk_create([
+                Profile(
+                    user=user,
+                    slug=f"bench-search-{offset + i}",
+                    full_name=f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}".title(),
+                    bio=" ".join(random.sample(WORDS, 8)),
+                    visibility=Profile.PUBLIC,
+                )
+                for i in range(min(batch, count - offset))
+            ])
+            ProfileSection.objects.bulk_create([
+                ProfileSection(profile=profile, section_type=ProfileSection.SKILLS, title=skill, data={"name": skill, "level": "Expert"})
+                for profile in profiles
+                for skill in random.sample(SKILLS, 2)
+            ])
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserDetail
+from blogs.models import Blogs
+from profiles.images import ensure_variants, generate_variants
+from profiles.models import Profile, Theme
+
+IMAGE_FIELDS = [
+    (Profile, "profile_image"),
+    (UserDetail, "profile_image"),
+    (Theme, "thumbnail"),
+    (Blogs, "thumbnail"),
+]
+
+
+class Command(BaseCommand):
+    help = "Build the resized WebP / JPEG variants for every stored image that doesn't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-render variants that already exist.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field in IMAGE_FIELDS:
+            names = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True}).values_list(field, flat=True)
+            for name in names.iterator():
+                if options["force"]:
+                    generate_variants(name)
+                ensure_variants(name)
+                total += 1
+            self.stdout.write(f"{model.__name__}.{field}: done")
+        self.stdout.write(self.style.SUCCESS(f"Checked {total} images."))
@@ -0,0 +1,205 @@
+"""
+Delete media files nothing points at any more.
+
+Replaced avatars, deleted profiles / users and abandoned direct uploads
+leave their files in the bucket. This command collects every name stored
+in a FileField (plus media URLs inside blog articles) as 64-bit hashes in
+a sorted array, 8 bytes per reference, then streams the storage
+listing page by page and deletes the unreferenced files in batches.
+
+Only the upload_to directories of the file fields and the pending direct
+uploads are swept, anything else in the bucket is left alone. Resized
+variants (name__w320.webp) live as long as their original, and files
+younger than --min-age hours are skipped so in-flight uploads survive.
+"""
+import hashlib
+import heapq
+import os
+import posixpath
+import re
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import FileField
+
+from accounts.uploads import PENDING_PREFIX
+from blogs.models import Blogs
+
+VARIANT_SUFFIX = re.compile(r"__w\d+$")
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class NameSet:
+    """
+    Sorted array of 64-bit hashes. Built from sorted chunks merged into one
+    array, so even the build stays around 16 bytes per entry. A collision can
+    only keep an orphan, never delete a live file.
+    """
+    CHUNK = 1 << 18
+
+    def __init__(self):
+        self._chunks = []
+        self._current = array("Q")
+        self._hashes = array("Q")
+
+    def add(self, value):
+        self._current.append(_hash(value))
+        if len(self._current) >= self.CHUNK:
+            self._chunks.append(array("Q", sorted(self._current)))
+            self._current = array("Q")
+
+    def freeze(self):
+        self._chunks.append(array("Q", sorted(self._current)))
+        self._current = array("Q")
+        self._hashes = array("Q", heapq.merge(*self._chunks))
+        self._chunks = []
+
+    def __contains__(self, value):
+        target = _hash(value)
+        index = bisect_left(self._hashes, target)
+        return index < len(self._hashes) and self._hashes[index] == target
+
+    def __len__(self):
+        return len(self._hashes)
+
+
+def file_fields():
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, FileField) and field.concrete:
+                yield model, field
+
+
+def swept_prefixes():
+    prefixes = {PENDING_PREFIX}
+    for _, field in file_fields():
+        upload_to = field.upload_to if isinstance(field.upload_to, str) else ""
+        # strftime placeholders: everything up to the first one is fixed
+        directory = posixpath.dirname(posixpath.join(upload_to.split("%")[0], "x"))
+        if directory:
+            prefixes.add(directory.rstrip("/") + "/")
+    # Nested directories are covered by their parent's listing
+    return [prefix for prefix in sorted(prefixes) if not any(prefix != other and prefix.startswith(other) for other in prefixes)]
+
+
+def referenced_names(stdout):
+    names = NameSet()
+
+    def add(name):
+        # By stem: variants only know their original's stem, not its extension.
+        # Stored names are unique per stem (the storage suffixes the stem on clashes)
+        names.add(posixpath.splitext(name)[0])
+
+    for model, field in file_fields():
+        rows = model._default_manager.exclude(**{field.name: ""}).exclude(**{f"{field.name}__isnull": True})
+        count = 0
+        for name in rows.values_list(field.name, flat=True).iterator(chunk_size=5000):
+            add(name)
+            count += 1
+        stdout.write(f"{model.__name__}.{field.name}: {count} referenced")
+
+    media_url = re.escape(settings.MEDIA_URL or "/media/")
+    pattern = re.compile(rf'(?:src|href)="[^"]*?{media_url}([^"?#]+)')
+    for html in Blogs.objects.values_list("rendered_html", flat=True).iterator(chunk_size=500):
+        for name in pattern.findall(html or ""):
+            add(name)
+
+    names.freeze()
+    return names
+
+
+def is_referenced(name, names):
+    stem = posixpath.splitext(name)[0]
+    return stem in names or VARIANT_SUFFIX.sub("", stem) in names
+
+
+def list_storage(storage, prefix):
+    """Yields (name, modified datetime) for every file under `prefix`, one listing page at a time."""
+    if hasattr(storage, "bucket") and hasattr(storage, "_normalize_name"):
+        location = storage._normalize_name(prefix)
+        offset = len(location) - len(prefix)
+        # boto3 collections fetch 1000 keys per request, lazily
+        for obj in storage.bucket.objects.filter(Prefix=location).page_size(1000):
+            yield obj.key[offset:], obj.last_modified
+        return
+
+    root = storage.path(prefix)
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            name = posixpath.join(prefix, os.path.relpath(path, root).replace(os.sep, "/"))
+            yield name, datetime.fromtimestamp(os.stat(path).st_mtime, tz=timezone.utc)
+
+
+def delete_batch(storage, names):
+    if hasattr(storage, "bucket") and hasattr(storage, "_normalize_name"):
+        # One DeleteObjects request per batch (S3 accepts up to 1000 keys)
+        storage.bucket.delete_objects(
+            Delete={"Objects": [{"Key": storage._normalize_name(name)} for name in names], "Quiet": True}
+        )
+        drop_local = getattr(storage, "_drop_local", None)
+        if drop_local:
+            for name in names:
+                drop_local(name)
+        return
+    for name in names:
+        storage.delete(name)
+
+
+class Command(BaseCommand):
+    help = "Delete media files that no FileField references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Files deleted per request (max 1000).")
+        parser.add_argument("--rate", type=float, default=200, help="Maximum deletions per second.")
+        parser.add_argument("--min-age", type=float, default=24, help="Skip files modified in the last N hours.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, min(options["batch_size"], 1000))
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=options["min_age"])
+        storage = default_storage
+
+        names = referenced_names(self.stdout)
+        self.stdout.write(f"{len(names)} reference hashes ({len(names) * 8 / 1024 / 1024:.1f} MB)")
+
+        scanned = orphans = 0
+        batch = []
+
+        def flush():
+            if not batch:
+                return
+            if options["dry_run"]:
+                for name in batch:
+                    self.stdout.write(f"  would delete {name}")
+            else:
+                started = time.monotonic()
+                delete_batch(storage, batch)
+                # Spread the batches out so deletions stay under --rate per second
+                remaining = len(batch) / options["rate"] - (time.monotonic() - started)
+                if remaining > 0:
+                    time.sleep(remaining)
+            batch.clear()
+
+        for prefix in swept_prefixes():
+            for name, modified in list_storage(storage, prefix):
+                scanned += 1
+                if modified > cutoff or is_referenced(name, names):
+                    continue
+                orphans += 1
+                batch.append(name)
+                if len(batch) >= batch_size:
+                    flush()
+        flush()
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} files. {verb} {orphans} orphans."))
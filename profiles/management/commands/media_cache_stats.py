@@ -0,0 +1,34 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from BioStack.storage import LocalCacheMixin, metrics
+
+
+class Command(BaseCommand):
+    help = "Show hit / miss counts and disk usage of the local media cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--evict", action="store_true", help="Trim the cache to its size limit now.")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, LocalCacheMixin):
+            self.stdout.write("The default storage has no local media cache.")
+            return
+
+        metrics.flush()
+        totals = metrics.totals()
+        lookups = totals["hits"] + totals["misses"]
+        hit_rate = 100 * totals["hits"] / lookups if lookups else 0
+        self.stdout.write(
+            f"hits={totals['hits']} misses={totals['misses']} hit_rate={hit_rate:.1f}% "
+            f"evictions={totals['evictions']} corrupt={totals['corrupt']}"
+        )
+
+        if options["evict"]:
+            used = default_storage.evict()
+        else:
+            used = sum(entry[1] for entry in default_storage._entries())
+        limit = default_storage.cache_max_bytes
+        self.stdout.write(
+            f"{default_storage.cache_dir}: {used / 1024 / 1024:.1f} MB of {limit / 1024 / 1024:.0f} MB"
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from profiles import search
+
+
+class Command(BaseCommand):
+    help = "Recompute the profile search documents (after a bulk import or a SEARCH_CONFIG change)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000, help="Profiles per UPDATE on PostgreSQL.")
+
+    def handle(self, *args, **options):
+        if not search.use_postgres():
+            self.stdout.write("Not on PostgreSQL: each worker builds its in-process index on its first search.")
+            return
+        count = search.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} profiles."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from profiles.trending import refresh_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute the time-decayed trending score of every profile (run from cron, e.g. every 15 minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Profiles per UPDATE.")
+
+    def handle(self, *args, **options):
+        updated = refresh_scores(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} trending scores."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from profiles.rollups import run_rollup
+
+
+class Command(BaseCommand):
+    help = "Incrementally aggregate ProfileView / LinkClick rows into ProfileDailyStats (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore the watermark and rebuild the rollups from the first recorded event.",
+        )
+
+    def handle(self, *args, **options):
+        result = run_rollup(full=options["full"])
+        if result is None:
+            self.stdout.write("No analytics events to roll up.")
+            return
+
+        first_day, last_day, written = result
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {first_day} .. {last_day} ({written} profile-days)."))
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 18:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_alter_linkclick_timestamp_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfileDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('unique_visitors', models.PositiveIntegerField(default=0)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='profiles.profile')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('profile', 'date'), name='unique_profile_daily_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_analyticswatermark_profiledailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='linkclick',
+            name='profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='clicks', to='profiles.profile'),
+        ),
+        migrations.AddIndex(
+            model_name='linkclick',
+            index=models.Index(fields=['profile', 'timestamp'], name='linkclick_profile_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profileview',
+            index=models.Index(fields=['profile', 'timestamp'], name='profileview_profile_ts_idx'),
+        ),
+    ]
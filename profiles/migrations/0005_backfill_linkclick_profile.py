@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 18:22
+
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery
+
+CHUNK_SIZE = 10000
+
+
+def backfill_link_click_profile(apps, schema_editor):
+    LinkClick = apps.get_model('profiles', 'LinkClick')
+    ProfileSection = apps.get_model('profiles', 'ProfileSection')
+
+    section_profile = ProfileSection.objects.filter(id=OuterRef('profile_section_id')).values('profile_id')[:1]
+    max_id = LinkClick.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+    # Walk the primary key in fixed ranges, each UPDATE commits on its own
+    # so a large table never holds one long transaction / lock
+    for start in range(0, max_id, CHUNK_SIZE):
+        LinkClick.objects.filter(
+            id__gt=start,
+            id__lte=start + CHUNK_SIZE,
+            profile__isnull=True,
+        ).update(profile_id=Subquery(section_profile))
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('profiles', '0004_linkclick_profile_linkclick_linkclick_profile_ts_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_link_click_profile, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 6.0 on 2026-10-18 18:40
+
+from datetime import date
+
+from django.db import migrations
+
+TABLE = 'profiles_profileview'
+OLD_TABLE = 'profiles_profileview_unpartitioned'
+SEQUENCE = 'profiles_profileview_partitioned_id_seq'
+
+# Partitions created up front past the current month, `analytics_retention`
+# keeps creating new ones from then on
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_profileview(apps, schema_editor):
+    """
+    PostgreSQL only: turn profiles_profileview into a table range partitioned
+    by month on `timestamp`. Other databases keep the plain table.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(timestamp) FROM {TABLE}")
+        first = cursor.fetchone()[0]
+
+    today = date.today()
+    month = date((first or today).year, (first or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+
+    statements = [
+        f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}",
+        f"CREATE SEQUENCE {SEQUENCE}",
+        # The primary key of a partitioned table has to include the partition key
+        f"""
+        CREATE TABLE {TABLE} (
+            id bigint NOT NULL DEFAULT nextval('{SEQUENCE}'),
+            ip_address inet NULL,
+            timestamp timestamp with time zone NOT NULL,
+            profile_id bigint NOT NULL,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+        """,
+        f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id",
+        # Catches rows outside every monthly partition so inserts never fail
+        f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT",
+    ]
+    while month <= last:
+        upper = _add_months(month, 1)
+        statements.append(
+            f"CREATE TABLE {TABLE}_y{month.year}m{month.month:02d} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+
+    statements += [
+        f"INSERT INTO {TABLE} (id, ip_address, timestamp, profile_id) "
+        f"SELECT id, ip_address, timestamp, profile_id FROM {OLD_TABLE}",
+        f"SELECT setval('{SEQUENCE}', COALESCE((SELECT max(id) FROM {TABLE}), 0) + 1, false)",
+        f"DROP TABLE {OLD_TABLE}",
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT profiles_profileview_profile_id_fk "
+        f"FOREIGN KEY (profile_id) REFERENCES profiles_profile (id) DEFERRABLE INITIALLY DEFERRED",
+        # Same name as the index in ProfileView.Meta, created on every partition
+        f"CREATE INDEX profileview_profile_ts_idx ON {TABLE} (profile_id, timestamp)",
+    ]
+
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_backfill_linkclick_profile'),
+    ]
+
+    operations = [
+        # The partitioned table has the same columns, the ORM works unchanged,
+        # so going backwards just leaves it partitioned
+        migrations.RunPython(partition_profileview, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 18:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_partition_profileview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileVisitorSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visitor_sketches', to='profiles.profile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('profile', 'date'), name='unique_profile_visitor_sketch')],
+            },
+        ),
+    ]
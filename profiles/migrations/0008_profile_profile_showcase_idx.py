@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 20:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_profilevisitorsketch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['visibility', 'created_at', 'id'], name='profile_showcase_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-18 20:40
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CONFIG = 'english'
+
+# Same document as profiles.search.UPDATE_SQL
+BACKFILL_SQL = """
+UPDATE profiles_profile p SET search_vector =
+    setweight(to_tsvector(%(config)s::regconfig, coalesce(p.full_name, '')), 'A') ||
+    setweight(to_tsvector(%(config)s::regconfig, coalesce(p.bio, '')), 'B') ||
+    setweight(to_tsvector(%(config)s::regconfig, coalesce((
+        SELECT string_agg(s.title || ' ' || CASE WHEN s.section_type = 'SKILLS' THEN coalesce(s.data ->> 'name', '') ELSE '' END, ' ')
+        FROM profiles_profilesection s WHERE s.profile_id = p.id
+    ), '')), 'C')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    """PostgreSQL only: GIN index on the tsvector and fill it for existing profiles."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(BACKFILL_SQL, {'config': CONFIG})
+    schema_editor.execute("CREATE INDEX profile_search_idx ON profiles_profile USING gin (search_vector)")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS profile_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0008_profile_profile_showcase_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # GinIndex in Meta would emit USING gin on every backend, so it is
+        # created here for PostgreSQL only
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
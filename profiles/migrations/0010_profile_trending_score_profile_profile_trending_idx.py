@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 21:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0009_profile_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['visibility', 'trending_score', 'id'], name='profile_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+import accounts.images
+import accounts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0010_profile_trending_score_profile_profile_trending_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='profile_image',
+            field=accounts.images.CleanImageField(blank=True, null=True, upload_to='profile_images/', validators=[accounts.models.validate_image_size, accounts.models.validate_image_pixels]),
+        ),
+        migrations.AlterField(
+            model_name='theme',
+            name='thumbnail',
+            field=accounts.images.CleanImageField(blank=True, null=True, upload_to='theme_thumbnails/', validators=[accounts.models.validate_image_size, accounts.models.validate_image_pixels]),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+from profiles.render_document import build_document
+
+
+def build_existing(apps, schema_editor):
+    Profile = apps.get_model('profiles', 'Profile')
+    for profile in Profile.objects.select_related('user__details').iterator():
+        sections = profile.sections.filter(is_enabled=True).order_by('order', 'created_at')
+        profile.render_document = build_document(profile, sections)
+        profile.save(update_fields=['render_document'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0011_alter_profile_profile_image_alter_theme_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='render_document',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(build_existing, migrations.RunPython.noop),
+    ]
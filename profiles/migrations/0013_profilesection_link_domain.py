@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+from profiles.favicons import domain_for
+
+
+def fill_link_domains(apps, schema_editor):
+    ProfileSection = apps.get_model('profiles', 'ProfileSection')
+    for section in ProfileSection.objects.filter(section_type='LINKS').only('id', 'data').iterator():
+        domain = domain_for((section.data or {}).get('url'))
+        if domain:
+            ProfileSection.objects.filter(pk=section.pk).update(link_domain=domain)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0012_profile_render_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilesection',
+            name='link_domain',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=253),
+        ),
+        migrations.RunPython(fill_link_domains, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,16 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db.models import UniqueConstraint,Q
 from django.utils.text import slugify
 from django.utils import timezone
 import secrets
 
+from accounts.images import CleanImageField
+from accounts.models import validate_image_size, validate_image_pixels
+
+from .favicons import domain_for
+
     
 # Model for theme
 class Theme(models.Model):
@@ -15,7 +21,7 @@ class Theme(models.Model):
     template_name = models.CharField(max_length=255)
 
     #preview Image for Dashbaord
-    thumbnail = models.ImageField(upload_to="theme_thumbnails/",blank=True,null=True)
+    thumbnail = CleanImageField(upload_to="theme_thumbnails/",blank=True,null=True,validators=[validate_image_size,validate_image_pixels])
 
     #for premium
     is_premium = models.BooleanField(default=False)
@@ -40,7 +46,7 @@ class Profile(models.Model):
     )
 
 # Profile Image 
-    profile_image = models.ImageField(upload_to="profile_images/",blank=True,null=True)
+    profile_image = CleanImageField(upload_to="profile_images/",blank=True,null=True,validators=[validate_image_size,validate_image_pixels])
 
     full_name = models.CharField(max_length=255, blank=True,)
     bio = models.TextField(blank=True)
@@ -57,8 +63,22 @@ class Profile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Full-text document, maintained by profiles.search (PostgreSQL only, GIN indexed)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Time-decayed activity, refreshed in batches by `manage.py refresh_trending`
+    trending_score = models.FloatField(default=0, editable=False)
+
+    # Pre-grouped theme data, rebuilt by signals (see profiles.render_document)
+    render_document = models.JSONField(default=dict, blank=True, editable=False)
+
     class Meta:
         constraints = [ models.UniqueConstraint(fields=['user', 'slug'],name='unique_user_profile_slug')]
+        # Showcase keyset pagination: public profiles by (created_at, id) or (trending_score, id)
+        indexes = [
+            models.Index(fields=['visibility', 'created_at', 'id'], name='profile_showcase_idx'),
+            models.Index(fields=['visibility', 'trending_score', 'id'], name='profile_trending_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -118,6 +138,17 @@ class ProfileSection(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Host of a LINKS section's url, the only domains the favicon endpoint serves
+    link_domain = models.CharField(max_length=253, blank=True, default="", db_index=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        url = (self.data or {}).get("url") if self.section_type == self.LINKS else None
+        self.link_domain = domain_for(url) or ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"data", "section_type"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"link_domain"}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ["order", "created_at"]
         constraints = [
@@ -157,17 +188,58 @@ class Feedback(models.Model):
 class ProfileView(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='views')
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event is recorded, not when the buffered batch is written
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [models.Index(fields=['profile', 'timestamp'], name='profileview_profile_ts_idx')]
 
 class LinkClick(models.Model):
     profile_section = models.ForeignKey(ProfileSection, on_delete=models.CASCADE, related_name='clicks')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Copied from profile_section on write so per-profile click queries don't join ProfileSection
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='clicks', null=True, blank=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [models.Index(fields=['profile', 'timestamp'], name='linkclick_profile_ts_idx')]
+
+# Daily rollups (kept current by `manage.py rollup_analytics`)
+
+class ProfileDailyStats(models.Model):
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+    unique_visitors = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [UniqueConstraint(fields=['profile', 'date'], name='unique_profile_daily_stats')]
+
+    def __str__(self):
+        return f"{self.profile_id} - {self.date}"
+
+class ProfileVisitorSketch(models.Model):
+    """HyperLogLog registers (see profiles/hll.py) of the visitors a profile had on one day."""
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='visitor_sketches')
+    date = models.DateField()
+    registers = models.BinaryField()
+
+    class Meta:
+        constraints = [UniqueConstraint(fields=['profile', 'date'], name='unique_profile_visitor_sketch')]
+
+    def __str__(self):
+        return f"{self.profile_id} - {self.date}"
+
+class AnalyticsWatermark(models.Model):
+    """Remembers how far a background job has processed the raw analytics tables."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
 
 #model for subscription 
 
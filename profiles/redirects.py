@@ -0,0 +1,71 @@
+"""
+Per-process LRU map of link section id -> (target url, profile id) used by
+track_link_click, so a popular link redirects without a database read.
+
+Entries are dropped on ProfileSection save/delete in this process (see
+signals.py) and expire after LINK_REDIRECT_CACHE_TTL seconds, which bounds
+how long another worker can keep serving an edited link.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import ProfileSection
+
+MAX_ENTRIES = getattr(settings, "LINK_REDIRECT_CACHE_SIZE", 10000)
+TTL = getattr(settings, "LINK_REDIRECT_CACHE_TTL", 60)
+
+
+class RedirectCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, section_id):
+        with self._lock:
+            entry = self._entries.get(section_id)
+            if entry is None:
+                return None
+            expires_at, target = entry
+            if expires_at < time.monotonic():
+                del self._entries[section_id]
+                return None
+            self._entries.move_to_end(section_id)
+            return target
+
+    def set(self, section_id, target):
+        with self._lock:
+            self._entries[section_id] = (time.monotonic() + self.ttl, target)
+            self._entries.move_to_end(section_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, section_id):
+        with self._lock:
+            self._entries.pop(section_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+redirects = RedirectCache()
+
+
+def resolve_link(section_id):
+    """Returns (url, profile_id) for a link section, or None if it doesn't exist."""
+    target = redirects.get(section_id)
+    if target is not None:
+        return target
+
+    # Only pull data->url out of the JSON blob, not the whole document
+    row = ProfileSection.objects.filter(id=section_id).values_list('data__url', 'profile_id').first()
+    if row is None:
+        return None
+
+    redirects.set(section_id, row)
+    return row
@@ -0,0 +1,85 @@
+"""
+Pre-grouped render data for public profiles.
+
+`Profile.render_document` holds everything a theme needs as plain JSON: the
+profile fields the themes show and the enabled sections, in display order,
+already grouped by type the way {% regroup %} used to group them:
+
+    {"version": 1,
+     "profile": {"id", "full_name", "bio", "slug", "profile_image",
+                 "user": {"details": {"profile_image"}}},
+     "groups": [{"grouper": "ABOUT", "list": [{"id", "section_type", "title",
+                                               "data", "updated_at"}]}, ...]}
+
+Signals rebuild it whenever the profile, its sections or the owner's
+details change, so public_profile_view renders from one row.
+"""
+from .models import Profile
+
+VERSION = 1
+
+
+def _stamp(value):
+    # Microseconds, the resolution the section fragment cache keys on
+    return int(value.timestamp() * 1_000_000) if value else None
+
+
+def section_dict(section):
+    return {
+        "id": section.pk,
+        "section_type": section.section_type,
+        "title": section.title,
+        "data": section.data or {},
+        "updated_at": _stamp(getattr(section, "updated_at", None)),
+    }
+
+
+def group_sections(sections):
+    """Consecutive sections of one type grouped like {% regroup %}: [{"grouper", "list"}]."""
+    groups = []
+    for section in sections:
+        section_type = section["section_type"] if isinstance(section, dict) else section.section_type
+        if groups and groups[-1]["grouper"] == section_type:
+            groups[-1]["list"].append(section)
+        else:
+            groups.append({"grouper": section_type, "list": [section]})
+    return groups
+
+
+def build_document(profile, sections):
+    details = getattr(profile.user, "details", None)
+    fallback_image = details.profile_image.name if details and details.profile_image else ""
+    return {
+        "version": VERSION,
+        "profile": {
+            "id": profile.pk,
+            "full_name": profile.full_name,
+            "bio": profile.bio,
+            "slug": profile.slug,
+            "profile_image": profile.profile_image.name if profile.profile_image else "",
+            "user": {"details": {"profile_image": fallback_image}},
+        },
+        "groups": group_sections([section_dict(section) for section in sections]),
+    }
+
+
+def render_context(document):
+    """Template context for a theme: the profile dict, the groups and the flat section list."""
+    groups = document["groups"]
+    return {
+        "profile": document["profile"],
+        "section_groups": groups,
+        "sections": [section for group in groups for section in group["list"]],
+    }
+
+
+def rebuild(profile_ids):
+    """Rebuild and store the render documents of `profile_ids`. Returns {profile_id: document}."""
+    documents = {}
+    profiles = Profile.objects.filter(pk__in=list(profile_ids)).select_related("user__details")
+    for profile in profiles:
+        document = build_document(profile, profile.sections.filter(is_enabled=True))
+        # update() rather than save(): no signals, so no rebuild loop
+        Profile.objects.filter(pk=profile.pk).update(render_document=document)
+        documents[profile.pk] = document
+    return documents
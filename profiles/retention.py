@@ -0,0 +1,156 @@
+"""
+Retention for the raw analytics tables.
+
+On PostgreSQL profiles_profileview is range partitioned by month (migration
+0006): upcoming partitions are created ahead of time and expired months are
+dropped as whole tables. Other databases keep one plain table and expired
+rows are deleted in chunks. Either way the expired days are rolled up into
+ProfileDailyStats first, so the dashboard totals never change.
+"""
+import re
+from datetime import date
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ProfileView, LinkClick, AnalyticsWatermark
+from .rollups import RETENTION_WATERMARK, run_rollup, rollup_boundary, start_of_day
+
+TABLE = ProfileView._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_RE = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+DELETE_CHUNK_SIZE = 10000
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions():
+    """Returns {month (date): partition table name} for the attached monthly partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def ensure_partitions(months_ahead=3):
+    """Create the monthly partitions from this month up to `months_ahead` months ahead."""
+    existing = monthly_partitions()
+    created = []
+    month = month_start(timezone.localdate())
+
+    for _ in range(months_ahead + 1):
+        if month not in existing:
+            _create_partition(month)
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def _create_partition(month):
+    name = partition_name(month)
+    lower = start_of_day(month)
+    upper = start_of_day(add_months(month, 1))
+    qn = connection.ops.quote_name
+
+    # Rows for this month may already sit in the default partition, and
+    # attaching fails while they do: move them over first
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} WHERE timestamp >= %s AND timestamp < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            [lower, upper],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+
+
+def prune_before(cutoff, dry_run=False):
+    """
+    Roll up and remove raw ProfileView / LinkClick rows older than `cutoff`
+    (a date). Returns a list of human readable actions.
+    """
+    actions = []
+
+    # Compact first: every expired day must be closed in the rollups
+    boundary = rollup_boundary()
+    if boundary is None or boundary <= cutoff:
+        actions.append("roll up analytics up to now")
+        if not dry_run:
+            run_rollup()
+
+    cutoff_at = start_of_day(cutoff)
+
+    if is_partitioned():
+        qn = connection.ops.quote_name
+        for month, name in sorted(monthly_partitions().items()):
+            if add_months(month, 1) <= cutoff:
+                actions.append(f"drop partition {name}")
+                if not dry_run:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DROP TABLE {qn(name)}")
+        actions.append(f"delete rows older than {cutoff} from {DEFAULT_PARTITION} and partially expired months")
+        if not dry_run:
+            _delete_in_chunks(ProfileView.objects.filter(timestamp__lt=cutoff_at))
+    else:
+        count = ProfileView.objects.filter(timestamp__lt=cutoff_at).count()
+        actions.append(f"delete {count} profile views older than {cutoff}")
+        if not dry_run:
+            _delete_in_chunks(ProfileView.objects.filter(timestamp__lt=cutoff_at))
+
+    count = LinkClick.objects.filter(timestamp__lt=cutoff_at).count()
+    actions.append(f"delete {count} link clicks older than {cutoff}")
+    if not dry_run:
+        _delete_in_chunks(LinkClick.objects.filter(timestamp__lt=cutoff_at))
+        # Rollups before this point can no longer be rebuilt from raw rows
+        AnalyticsWatermark.objects.update_or_create(name=RETENTION_WATERMARK, defaults={'value': cutoff_at})
+
+    return actions
+
+
+def _delete_in_chunks(queryset):
+    model = queryset.model
+    while True:
+        ids = list(queryset.order_by().values_list('id', flat=True)[:DELETE_CHUNK_SIZE])
+        if not ids:
+            return
+        model.objects.filter(id__in=ids).delete()
@@ -0,0 +1,107 @@
+"""
+Daily analytics rollups.
+
+ProfileDailyStats holds one row per profile per day. `run_rollup` recomputes
+every day from the stored watermark up to now, so re-running it is safe and
+events that arrive late (buffered writes) are picked up by the next run.
+Days before the watermark's date are "closed": readers take them from the
+rollup table and only count raw rows for the open days.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ProfileView, LinkClick, ProfileDailyStats, AnalyticsWatermark
+
+WATERMARK_NAME = "daily_rollup"
+# Raw rows before this point were pruned (see retention.py), never rebuild those days
+RETENTION_WATERMARK = "retention"
+
+# Leave room for events still sitting in the ingestion buffers
+ROLLUP_LAG = timedelta(seconds=getattr(settings, "ANALYTICS_ROLLUP_LAG", 5 * 60))
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rollup_boundary():
+    """
+    First day that is NOT fully covered by ProfileDailyStats, or None if the
+    rollup has never run (everything must then be counted from raw rows).
+    """
+    value = AnalyticsWatermark.objects.filter(name=WATERMARK_NAME).values_list('value', flat=True).first()
+    if value is None:
+        return None
+    return timezone.localdate(value)
+
+
+def rollup_days(first_day, last_day):
+    """Recompute ProfileDailyStats for every profile for first_day..last_day (inclusive)."""
+    start = start_of_day(first_day)
+    end = start_of_day(last_day + timedelta(days=1))
+
+    rows = {}
+
+    views_qs = (
+        ProfileView.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        .annotate(date=TruncDate('timestamp'))
+        .values('profile_id', 'date')
+        .annotate(views=Count('id'), unique_visitors=Count('ip_address', distinct=True))
+        .order_by()
+    )
+    for entry in views_qs:
+        row = rows.setdefault((entry['profile_id'], entry['date']), {'views': 0, 'clicks': 0, 'unique_visitors': 0})
+        row['views'] = entry['views']
+        row['unique_visitors'] = entry['unique_visitors']
+
+    clicks_qs = (
+        LinkClick.objects.filter(timestamp__gte=start, timestamp__lt=end, profile__isnull=False)
+        .annotate(date=TruncDate('timestamp'))
+        .values('profile_id', 'date')
+        .annotate(clicks=Count('id'))
+        .order_by()
+    )
+    for entry in clicks_qs:
+        row = rows.setdefault((entry['profile_id'], entry['date']), {'views': 0, 'clicks': 0, 'unique_visitors': 0})
+        row['clicks'] = entry['clicks']
+
+    with transaction.atomic():
+        ProfileDailyStats.objects.filter(date__gte=first_day, date__lte=last_day).delete()
+        ProfileDailyStats.objects.bulk_create(
+            [ProfileDailyStats(profile_id=profile_id, date=day, **counts) for (profile_id, day), counts in rows.items()],
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+def run_rollup(full=False, now=None):
+    """
+    Bring the rollups up to date and move the watermark forward.
+    Returns (first_day, last_day, rows_written) or None if there is nothing to do.
+    """
+    now = now or timezone.now()
+    watermark_at = now - ROLLUP_LAG
+    last_day = timezone.localdate(now)
+
+    first_day = None if full else rollup_boundary()
+    if first_day is None:
+        earliest = ProfileView.objects.aggregate(first=Min('timestamp'))['first']
+        earliest_click = LinkClick.objects.aggregate(first=Min('timestamp'))['first']
+        candidates = [value for value in (earliest, earliest_click) if value]
+        if not candidates:
+            AnalyticsWatermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'value': watermark_at})
+            return None
+        first_day = timezone.localdate(min(candidates))
+
+        horizon = AnalyticsWatermark.objects.filter(name=RETENTION_WATERMARK).values_list('value', flat=True).first()
+        if horizon is not None:
+            first_day = max(first_day, timezone.localdate(horizon))
+
+    written = rollup_days(first_day, last_day)
+    AnalyticsWatermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'value': watermark_at})
+    return first_day, last_day, written
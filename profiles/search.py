@@ -0,0 +1,228 @@
+"""
+Full-text search over public profiles.
+
+A profile's document is its full name (weight A), bio (B) and section
+titles plus skill names (C). Every search term is matched as a prefix and
+all terms must match.
+
+PostgreSQL keeps the document in Profile.search_vector (a GIN indexed
+tsvector, migration 0009) and searches with to_tsquery / ts_rank. Other
+databases get an in-process inverted index: built from the database on
+the first search, then updated incrementally by the save signals. It is
+per worker, so edits made through another process only show up after a
+restart there.
+"""
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+
+from .models import Profile, ProfileSection
+
+SEARCH_CONFIG = getattr(settings, "SEARCH_CONFIG", "english")
+RESULT_LIMIT = getattr(settings, "SEARCH_RESULT_LIMIT", 48)
+MAX_TERMS = 8
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Same relative weights ts_rank uses by default for A / B / C
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2}
+
+UPDATE_SQL = """
+UPDATE profiles_profile p SET search_vector =
+    setweight(to_tsvector(%(config)s::regconfig, coalesce(p.full_name, '')), 'A') ||
+    setweight(to_tsvector(%(config)s::regconfig, coalesce(p.bio, '')), 'B') ||
+    setweight(to_tsvector(%(config)s::regconfig, coalesce((
+        SELECT string_agg(s.title || ' ' || CASE WHEN s.section_type = 'SKILLS' THEN coalesce(s.data ->> 'name', '') ELSE '' END, ' ')
+        FROM profiles_profilesection s WHERE s.profile_id = p.id
+    ), '')), 'C')
+"""
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def section_text(section_type, title, data):
+    if section_type == ProfileSection.SKILLS and isinstance(data, dict):
+        return f"{title} {data.get('name') or ''}"
+    return title or ""
+
+
+def use_postgres():
+    return connection.vendor == "postgresql"
+
+
+# --- PostgreSQL ---
+
+def update_vectors(where, params):
+    """Recompute search_vector for the profiles matching the `where` SQL."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"{UPDATE_SQL} WHERE {where}", {"config": SEARCH_CONFIG, **params})
+        return cursor.rowcount
+
+
+def _search_postgres(terms, limit):
+    # Every term as a prefix: "dja dev" -> dja:* & dev:*
+    query = SearchQuery(" & ".join(f"{term}:*" for term in terms), config=SEARCH_CONFIG, search_type="raw")
+    return list(
+        Profile.objects.filter(visibility=Profile.PUBLIC, search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-id")
+        .values_list("id", flat=True)[:limit]
+    )
+
+
+# --- In-process fallback ---
+
+class InvertedIndex:
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)  # token -> {profile_id: score}
+        self._documents = {}                # profile_id -> tokens it is listed under
+        self._vocabulary = []               # sorted tokens, for prefix lookups
+
+    def _documents_for(self, profiles, sections):
+        """{profile_id: {token: score}} for (id, full_name, bio) rows and their sections."""
+        documents = {}
+        for profile_id, full_name, bio in profiles:
+            scores = documents[profile_id] = {}
+            for weight, text in (("A", full_name), ("B", bio)):
+                for token in tokenize(text):
+                    scores[token] = max(scores.get(token, 0), WEIGHTS[weight])
+
+        for profile_id, section_type, title, data in sections.values_list("profile_id", "section_type", "title", "data").iterator():
+            scores = documents.get(profile_id)
+            if scores is None:
+                continue
+            for token in tokenize(section_text(section_type, title, data)):
+                scores[token] = max(scores.get(token, 0), WEIGHTS["C"])
+        return documents
+
+    def _add(self, profile_id, scores):
+        for token, score in scores.items():
+            postings = self._postings[token]
+            if not postings:
+                bisect.insort(self._vocabulary, token)
+            postings[profile_id] = score
+        self._documents[profile_id] = list(scores)
+
+    def _remove(self, profile_id):
+        for token in self._documents.pop(profile_id, []):
+            postings = self._postings[token]
+            postings.pop(profile_id, None)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def load(self):
+        with self._lock:
+            if self.loaded:
+                return
+            rows = Profile.objects.filter(visibility=Profile.PUBLIC).values_list("id", "full_name", "bio").iterator()
+            sections = ProfileSection.objects.filter(profile__visibility=Profile.PUBLIC)
+            for profile_id, scores in self._documents_for(rows, sections).items():
+                self._add(profile_id, scores)
+            self.loaded = True
+
+    def reset(self):
+        with self._lock:
+            self.__init__()
+
+    def update(self, profile_ids):
+        # Before the first search there is nothing to keep current
+        if not self.loaded:
+            return
+        rows = Profile.objects.filter(id__in=profile_ids, visibility=Profile.PUBLIC).values_list("id", "full_name", "bio")
+        documents = self._documents_for(rows, ProfileSection.objects.filter(profile_id__in=profile_ids))
+        with self._lock:
+            for profile_id in profile_ids:
+                self._remove(profile_id)
+            for profile_id, scores in documents.items():
+                self._add(profile_id, scores)
+
+    def remove(self, profile_id):
+        with self._lock:
+            self._remove(profile_id)
+
+    def _matches(self, term):
+        """{profile_id: best score} over every token starting with `term`."""
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + "\uffff")
+        if end - start == 1:
+            # Only one token: hand out its postings as they are (read only)
+            return self._postings[self._vocabulary[start]]
+        matches = {}
+        for token in self._vocabulary[start:end]:
+            for profile_id, score in self._postings[token].items():
+                if score > matches.get(profile_id, 0):
+                    matches[profile_id] = score
+        return matches
+
+    def search(self, terms, limit):
+        self.load()
+        with self._lock:
+            per_term = sorted((self._matches(term) for term in terms), key=len)
+
+            # Intersect starting from the rarest term so the candidate set stays small
+            totals = per_term[0]
+            for matches in per_term[1:]:
+                totals = {profile_id: total + matches[profile_id] for profile_id, total in totals.items() if profile_id in matches}
+                if not totals:
+                    break
+
+            best = heapq.nlargest(limit, totals.items(), key=itemgetter(1, 0))
+        return [profile_id for profile_id, _ in best]
+
+
+index = InvertedIndex()
+
+
+# --- Public API ---
+
+def search_profiles(query, limit=RESULT_LIMIT):
+    """Ids of the best matching public profiles, best first."""
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_TERMS]
+    if not terms:
+        return []
+    if use_postgres():
+        return _search_postgres(terms, limit)
+    return index.search(terms, limit)
+
+
+def update_profiles(profile_ids):
+    profile_ids = list(set(profile_ids))
+    if use_postgres():
+        update_vectors("p.id = ANY(%(ids)s)", {"ids": profile_ids})
+    else:
+        index.update(profile_ids)
+
+
+def remove_profile(profile_id):
+    if not use_postgres():
+        index.remove(profile_id)
+
+
+def rebuild(batch_size=10000):
+    """Recompute every document (PostgreSQL in id ranges). Returns rows touched."""
+    if not use_postgres():
+        index.reset()
+        index.load()
+        return len(index._documents)
+
+    ids = Profile.objects.order_by("id").values_list("id", flat=True)
+    last_id = ids.last()
+    updated = 0
+    start = ids.first() or 0
+    while last_id is not None and start <= last_id:
+        updated += update_vectors("p.id >= %(start)s AND p.id < %(end)s", {"start": start, "end": start + batch_size})
+        start += batch_size
+    return updated
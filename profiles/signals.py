@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Subscription
+from accounts.models import UserDetail
+from .models import Subscription, Profile, ProfileSection, Theme
+from .cache import invalidate_profile, invalidate_profiles, invalidate_dashboards
+from .redirects import redirects
+from . import search, render_document
+from .images import schedule_field_variants
 
 User = get_user_model()
 
@@ -14,4 +19,98 @@ def create_user_subscription(sender, instance, created, **kwargs):
 def save_user_subscription(sender, instance, **kwargs):
     if not hasattr(instance, 'subscription'):
         Subscription.objects.create(user=instance)
-    instance.subscription.save()
\ No newline at end of file
+    instance.subscription.save()
+
+# --- Render documents (what the public page is rendered from) ---
+# Registered before the cache invalidation below, so a cleared page is re-rendered from the new document
+
+# Saves touching only these fields don't change what the themes show
+UNRENDERED_FIELDS = {'render_document', 'trending_score', 'search_vector', 'visibility', 'theme'}
+
+@receiver(post_save, sender=Profile)
+def rebuild_profile_document(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= UNRENDERED_FIELDS:
+        return
+    render_document.rebuild([instance.id])
+
+@receiver([post_save, post_delete], sender=ProfileSection)
+def rebuild_section_profile_document(sender, instance, **kwargs):
+    render_document.rebuild([instance.profile_id])
+
+@receiver(post_save, sender=UserDetail)
+def rebuild_user_profile_documents(sender, instance, **kwargs):
+    # The account photo is the fallback avatar of every profile without one
+    render_document.rebuild(Profile.objects.filter(user_id=instance.user_id).values_list('id', flat=True))
+
+# --- Public profile render cache invalidation ---
+
+@receiver([post_save, post_delete], sender=Profile)
+def clear_profile_cache(sender, instance, **kwargs):
+    invalidate_profile(instance.id)
+    invalidate_dashboards([instance.id])
+
+@receiver([post_save, post_delete], sender=ProfileSection)
+def clear_section_profile_cache(sender, instance, **kwargs):
+    invalidate_profile(instance.profile_id)
+    invalidate_dashboards([instance.profile_id])
+    redirects.invalidate(instance.id)
+
+@receiver([post_save, post_delete], sender=UserDetail)
+def clear_user_profiles_cache(sender, instance, **kwargs):
+    invalidate_profiles(Profile.objects.filter(user_id=instance.user_id).values_list('id', flat=True))
+
+@receiver(post_save, sender=User)
+def clear_user_renamed_cache(sender, instance, created, update_fields=None, **kwargs):
+    # Showcase cards link to /<username>/..., logins only touch last_login
+    if created or update_fields == frozenset(['last_login']):
+        return
+    invalidate_profiles(Profile.objects.filter(user_id=instance.id).values_list('id', flat=True))
+
+@receiver(post_save, sender=Theme)
+def clear_theme_profiles_cache(sender, instance, **kwargs):
+    invalidate_profiles(instance.profiles.values_list('id', flat=True))
+
+@receiver(pre_delete, sender=Theme)
+def collect_theme_profiles(sender, instance, **kwargs):
+    # SET_NULL has already detached the profiles by the time post_delete runs
+    instance._cached_profile_ids = list(instance.profiles.values_list('id', flat=True))
+
+@receiver(post_delete, sender=Theme)
+def clear_deleted_theme_profiles_cache(sender, instance, **kwargs):
+    invalidate_profiles(getattr(instance, '_cached_profile_ids', []))
+
+# --- Search index maintenance ---
+
+@receiver(post_save, sender=Profile)
+def update_profile_search(sender, instance, **kwargs):
+    search.update_profiles([instance.id])
+
+@receiver(post_delete, sender=Profile)
+def remove_profile_search(sender, instance, **kwargs):
+    search.remove_profile(instance.id)
+
+@receiver([post_save, post_delete], sender=ProfileSection)
+def update_section_search(sender, instance, **kwargs):
+    search.update_profiles([instance.profile_id])
+
+# --- Resized image variants (built in the background) ---
+
+@receiver(post_save, sender=Profile)
+def build_profile_image_variants(sender, instance, **kwargs):
+    if instance.profile_image:
+        # The cached public page still points at the original, re-render it once they exist
+        schedule_field_variants(instance.profile_image, on_ready=lambda: invalidate_profile(instance.id))
+
+@receiver(post_save, sender=UserDetail)
+def build_user_image_variants(sender, instance, **kwargs):
+    if instance.profile_image:
+        user_id = instance.user_id
+        schedule_field_variants(
+            instance.profile_image,
+            on_ready=lambda: invalidate_profiles(Profile.objects.filter(user_id=user_id).values_list('id', flat=True)),
+        )
+
+@receiver(post_save, sender=Theme)
+def build_theme_thumbnail_variants(sender, instance, **kwargs):
+    if instance.thumbnail:
+        schedule_field_variants(instance.thumbnail)
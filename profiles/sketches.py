@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .hll import HyperLogLog
+from .models import ProfileVisitorSketch
+
+
+def add_visitors(visits):
+    """
+    Merge (profile_id, timestamp, visitor_key) tuples into the per-day
+    ProfileVisitorSketch rows. One read-modify-write per profile-day touched.
+    """
+    sketches = {}
+    for profile_id, timestamp, visitor in visits:
+        key = (profile_id, timezone.localdate(timestamp))
+        sketches.setdefault(key, HyperLogLog()).add(visitor)
+
+    for (profile_id, day), sketch in sketches.items():
+        # Row lock so two workers flushing the same profile-day don't lose registers
+        with transaction.atomic():
+            row, created = ProfileVisitorSketch.objects.select_for_update().get_or_create(
+                profile_id=profile_id,
+                date=day,
+                defaults={'registers': sketch.to_bytes()},
+            )
+            if not created:
+                row.registers = sketch.merge(HyperLogLog.from_bytes(row.registers)).to_bytes()
+                row.save(update_fields=['registers'])
+
+
+def unique_visitors(profile, first_day, last_day):
+    """Approximate distinct visitors of `profile` between first_day and last_day (inclusive)."""
+    sketch = HyperLogLog()
+    rows = ProfileVisitorSketch.objects.filter(profile=profile, date__gte=first_day, date__lte=last_day)
+    for registers in rows.values_list('registers', flat=True):
+        sketch.merge(HyperLogLog.from_bytes(registers))
+    return sketch.count()
@@ -0,0 +1,13 @@
+from django import template
+from django.urls import reverse
+
+from profiles.favicons import domain_for
+
+register = template.Library()
+
+
+@register.simple_tag
+def favicon_url(url):
+    """URL of the first-party favicon for a link, "" if the link has no usable domain."""
+    domain = domain_for(url)
+    return reverse("profiles:favicon", args=[domain]) if domain else ""
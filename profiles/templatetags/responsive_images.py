@@ -0,0 +1,42 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from profiles import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, alt="", css="", sizes="100vw", loading="lazy"):
+    """
+    <img> for an ImageField file (or a storage name, as in render documents)
+    with WebP / JPEG srcsets once the resized variants exist
+    (profiles/images.py), the plain original until then.
+    """
+    if not image:
+        return ""
+
+    if isinstance(image, str):
+        name, url, storage = image, default_storage.url(image), default_storage
+    else:
+        name, url, storage = getattr(image, "name", None), image.url, getattr(image, "storage", default_storage)
+    widths = images.available_widths(name) if name else None
+    if name and widths is None:
+        images.request_variants(name)
+
+    if not widths:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            url, alt, css, loading,
+        )
+
+    def srcset(extension):
+        return ", ".join(f"{storage.url(images.variant_name(name, width, extension))} {width}w" for width in widths)
+
+    # display:contents keeps <picture> out of the layout, the <img> sizes as before
+    return format_html(
+        '<picture style="display:contents"><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async"></picture>',
+        srcset("webp"), sizes, url, srcset("jpg"), sizes, alt, css, loading,
+    )
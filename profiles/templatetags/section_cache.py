@@ -0,0 +1,56 @@
+import hashlib
+
+from django import template
+from django.core.cache import cache
+
+from profiles.cache import SECTION_TIMEOUT, section_fragment_key
+
+register = template.Library()
+
+
+class SectionCacheNode(template.Node):
+    def __init__(self, nodelist, section, theme):
+        self.nodelist = nodelist
+        self.section = section
+        self.theme = theme
+        # Editing the block's template code must not serve old fragments
+        source = "".join(node.token.contents for node in nodelist.get_nodes_by_type(template.Node) if node.token)
+        self.version = hashlib.md5(source.encode()).hexdigest()[:8]
+
+    def _prefetched(self, context, theme):
+        # One get_many for every section on the page instead of a lookup per block
+        store = context.render_context.setdefault(self, {})
+        if theme not in store:
+            keys = [section_fragment_key(section, theme, self.version) for section in context.get("sections") or []]
+            store[theme] = cache.get_many([key for key in keys if key])
+        return store[theme]
+
+    def render(self, context):
+        section = self.section.resolve(context)
+        theme = self.theme.resolve(context)
+        key = section_fragment_key(section, theme, self.version)
+        if key is None:
+            return self.nodelist.render(context)
+
+        html = self._prefetched(context, theme).get(key)
+        if html is None:
+            html = self.nodelist.render(context)
+            cache.set(key, html, SECTION_TIMEOUT)
+        return html
+
+
+@register.tag
+def section_cache(parser, token):
+    """
+    {% section_cache section "theme" %}...{% endsection_cache %}
+
+    Caches the rendered block per section and theme; the key changes when the
+    section is saved (updated_at), so only edited sections are re-rendered.
+    The block must only depend on the section.
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a section and a theme name")
+    nodelist = parser.parse(("endsection_cache",))
+    parser.delete_first_token()
+    return SectionCacheNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
@@ -1,3 +1,690 @@
-from django.test import TestCase
+import importlib
+import os
+import tempfile
+import time
+import unittest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from accounts.images import was_uploaded
+
+from . import bots, images
+from .management.commands import gc_media
+from . import render_document, retention, rollups, search, trending
+from .analytics import EventBuffer, _normalize_ip
+from .cache import section_fragment_key
+from .dedup import RecentVisitors
+from .hll import HyperLogLog
+from .sketches import add_visitors, unique_visitors
+from .models import AnalyticsWatermark, LinkClick, Profile, ProfileDailyStats, ProfileSection, ProfileView, ProfileVisitorSketch, Theme
+
+
+# The default storage is S3, tests that write files use the local disk instead
+LOCAL_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def png_bytes(width=400, height=300):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class EventBufferTests(TransactionTestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="owner@example.com", username="owner")
+        self.profile = Profile.objects.create(user=user, slug="owner")
+        self.section = ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS)
+
+    def test_bad_row_does_not_drop_the_batch(self):
+        flushed = []
+        buffer = EventBuffer(LinkClick, on_flush=flushed.extend)
+        buffer.add(profile_section_id=self.section.pk, profile_id=self.profile.pk)
+        # A click on a section deleted while its redirect was still cached
+        buffer.add(profile_section_id=self.section.pk + 1000, profile_id=self.profile.pk)
+        buffer.add(profile_section_id=self.section.pk, profile_id=self.profile.pk)
+
+        with self.assertLogs("profiles.analytics", "WARNING"):
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(LinkClick.objects.count(), 2)
+        self.assertEqual(buffer.stats()["dropped"], 1)
+        self.assertEqual(len(flushed), 2)
+
+    def test_database_outage_requeues_the_batch(self):
+        buffer = EventBuffer(LinkClick, max_pending=10)
+        for _ in range(3):
+            buffer.add(profile_section_id=self.section.pk, profile_id=self.profile.pk)
+
+        outage = mock.patch.object(LinkClick.objects, "bulk_create", side_effect=OperationalError("gone"))
+        with outage as bulk_create, self.assertLogs("profiles.analytics") as logs:
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(bulk_create.call_count, 1)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(buffer.stats(), {"pending": 3, "flushed": 0, "dropped": 0})
+
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(LinkClick.objects.count(), 3)
+
+
+class NormalizeIpTests(TestCase):
+    def test_normalize_ip(self):
+        self.assertEqual(_normalize_ip(" 203.0.113.7"), "203.0.113.7")
+        self.assertEqual(_normalize_ip("2001:DB8::0:1"), "2001:db8::1")
+        self.assertIsNone(_normalize_ip("unknown"))
+        self.assertIsNone(_normalize_ip(None))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), STORAGES=LOCAL_STORAGES)
+class ImageVariantScheduleTests(TestCase):
+    def test_known_name_is_skipped(self):
+        cache.set(images._cache_key("theme_thumbnails/a.png"), [160], None)
+        with mock.patch.object(images, "_submit") as submit, self.captureOnCommitCallbacks(execute=True):
+            images.schedule_variants("theme_thumbnails/a.png")
+        submit.assert_not_called()
+
+    def test_replaced_content_is_rebuilt(self):
+        # An overwriting storage keeps the name, the cached widths are stale
+        cache.set(images._cache_key("theme_thumbnails/a.png"), [160], None)
+        with mock.patch.object(images, "_submit") as submit, self.captureOnCommitCallbacks(execute=True):
+            images.schedule_variants("theme_thumbnails/a.png", replaced=True)
+        self.assertIsNone(images.available_widths("theme_thumbnails/a.png"))
+        submit.assert_called_once_with("theme_thumbnails/a.png", None, force=True)
+
+    def test_upload_marks_field_file(self):
+        theme = Theme(name="Plain", slug="plain", template_name="themes/plain.html")
+        with mock.patch.object(images, "_submit") as submit, self.captureOnCommitCallbacks(execute=True):
+            theme.thumbnail.save("a.png", ContentFile(png_bytes()), save=True)
+        submit.assert_called_once_with(theme.thumbnail.name, None, force=True)
+        self.assertFalse(was_uploaded(theme.thumbnail))
+
+        with mock.patch.object(images, "_submit") as submit, self.captureOnCommitCallbacks(execute=True):
+            cache.set(images._cache_key(theme.thumbnail.name), [160, 320], None)
+            theme.save()
+        submit.assert_not_called()
+
+
+class FaviconTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(email="links@example.com", username="links")
+        profile = Profile.objects.create(user=user, slug="links")
+        ProfileSection.objects.create(
+            profile=profile, section_type=ProfileSection.LINKS, title="Site", data={"url": "https://Example.com/me"}
+        )
+
+    def test_link_domain_is_set_on_save(self):
+        self.assertEqual(ProfileSection.objects.get().link_domain, "example.com")
+
+    def test_only_linked_domains_are_served(self):
+        with mock.patch("profiles.favicons.FETCHER", "profiles.tests.stub_favicon"), mock.patch(
+            "profiles.favicons.default_storage"
+        ) as storage:
+            storage.exists.return_value = False
+            linked = self.client.get(reverse("profiles:favicon", args=["example.com"]))
+            unlinked = self.client.get(reverse("profiles:favicon", args=["unlinked.example.org"]))
+        self.assertEqual(linked.status_code, 200)
+        self.assertEqual(linked["Content-Type"], "image/png")
+        self.assertEqual(unlinked.status_code, 404)
+
+
+def stub_favicon(domain):
+    return png_bytes(32, 32)
+
+
+class BotClassificationTests(SimpleTestCase):
+    def test_crawlers_are_bots(self):
+        self.assertTrue(bots.is_bot("Mozilla/5.0 (compatible; Pinterestbot/1.0; +http://www.pinterest.com/bot.html)", "203.0.113.7"))
+        self.assertTrue(bots.is_bot("facebookexternalhit/1.1", "203.0.113.7"))
+        self.assertTrue(bots.is_bot("Mozilla/5.0 (compatible; YandexImages/3.0; +http://yandex.com/bots)", "203.0.113.7"))
+        self.assertTrue(bots.is_bot("WhatsApp/2.23.20.0 A", "203.0.113.7"))
+
+    def test_in_app_browsers_are_human(self):
+        pinterest_ios = (
+            "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 "
+            "(KHTML, like Gecko) Mobile/15E148 [Pinterest/iOS]"
+        )
+        self.assertFalse(bots.is_bot(pinterest_ios, "203.0.113.7"))
+        yandex_browser = (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/122.0.0.0 YaBrowser/24.4.0.0 Safari/537.36"
+        )
+        self.assertFalse(bots.is_bot(yandex_browser, "203.0.113.7"))
+        yandex_app = (
+            "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+            "Mobile/15E148 YandexSearch/8.10 YaApp_iOS/24.42"
+        )
+        self.assertFalse(bots.is_bot(yandex_app, "203.0.113.7"))
+        whatsapp_webview = (
+            "Mozilla/5.0 (Linux; Android 14; Pixel 8 Build/AP1A.240405.002; wv) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Version/4.0 Chrome/124.0.6367.82 Mobile Safari/537.36 WhatsApp/2.24.9.78"
+        )
+        self.assertFalse(bots.is_bot(whatsapp_webview, "203.0.113.7"))
+
+
+class FakeRedis:
+    """Just the bitmap commands RecentVisitors uses."""
+
+    def __init__(self):
+        self.bitmaps = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis, self.commands = redis, []
+
+    def getbit(self, key, position):
+        self.commands.append(lambda: int(position in self.redis.bitmaps.get(key, set())))
+
+    def setbit(self, key, position, value):
+        def run():
+            bits = self.redis.bitmaps.setdefault(key, set())
+            old = int(position in bits)
+            bits.add(position)
+            return old
+        self.commands.append(run)
+
+    def expire(self, key, seconds):
+        self.commands.append(lambda: True)
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+
+class RecentVisitorsTests(SimpleTestCase):
+    def visitors(self, **kwargs):
+        return RecentVisitors(window=60, capacity=1000, **kwargs)
+
+    def test_shared_bitmap_counts_a_visitor_once_across_workers(self):
+        redis = FakeRedis()
+        first, second = self.visitors(), self.visitors()
+        with mock.patch("profiles.dedup._redis_client", return_value=redis), mock.patch("time.time", return_value=6000):
+            self.assertFalse(first.seen(1, "203.0.113.7", "Firefox"))
+            self.assertTrue(second.seen(1, "203.0.113.7", "Firefox"))
+            self.assertFalse(second.seen(2, "203.0.113.7", "Firefox"))
+        # One bitmap per window slot, not a key per visitor
+        self.assertEqual(len(redis.bitmaps), 1)
+
+    def test_window_is_the_same_on_shared_and_local_paths(self):
+        redis = FakeRedis()
+        shared, local = self.visitors(), self.visitors()
+
+        def seen(visitors, now, client):
+            with mock.patch("profiles.dedup._redis_client", return_value=client), mock.patch("time.time", return_value=now):
+                return visitors.seen(1, "203.0.113.7", "Firefox")
+
+        for visitors, client in ((shared, redis), (local, None)):
+            self.assertFalse(seen(visitors, 6000, client))
+            self.assertTrue(seen(visitors, 6119, client))   # next slot: still remembered
+            self.assertFalse(seen(visitors, 6180, client))  # two slots later: counted again
+
+    def test_redis_errors_fall_back_to_the_local_filter(self):
+        redis = mock.Mock()
+        redis.pipeline.side_effect = ConnectionError("redis down")
+        visitors = self.visitors()
+        with mock.patch("profiles.dedup._redis_client", return_value=redis), self.assertLogs("profiles.dedup"):
+            self.assertFalse(visitors.seen(1, "203.0.113.7", "Firefox"))
+            self.assertTrue(visitors.seen(1, "203.0.113.7", "Firefox"))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), STORAGES=LOCAL_STORAGES)
+class GcMediaTests(TestCase):
+    def setUp(self):
+        self.media_root = settings.MEDIA_ROOT
+
+        user = get_user_model().objects.create_user(email="gc@example.com", username="gc")
+        Profile.objects.create(user=user, slug="gc", profile_image="profile_images/me.png")
+        self.day_old = time.time() - 2 * 24 * 60 * 60
+        for name in ("profile_images/me.png", "profile_images/me__w320.webp", "profile_images/old.png"):
+            self.write(name, self.day_old)
+        self.write("profile_images/fresh.png", time.time())
+
+    def write(self, name, mtime):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as handle:
+            handle.write(b"x")
+        os.utime(path, (mtime, mtime))
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def test_is_referenced_covers_originals_and_variants(self):
+        names = gc_media.NameSet()
+        names.add("profile_images/me")
+        names.freeze()
+        self.assertTrue(gc_media.is_referenced("profile_images/me.png", names))
+        self.assertTrue(gc_media.is_referenced("profile_images/me__w640.jpg", names))
+        self.assertFalse(gc_media.is_referenced("profile_images/other.png", names))
+        self.assertFalse(gc_media.is_referenced("profile_images/me2__w640.jpg", names))
+
+    def test_dry_run_deletes_nothing(self):
+        out = StringIO()
+        call_command("gc_media", "--dry-run", stdout=out)
+        self.assertIn("would delete profile_images/old.png", out.getvalue())
+        self.assertNotIn("would delete profile_images/me", out.getvalue())
+        self.assertTrue(self.exists("profile_images/old.png"))
+
+    def test_only_old_orphans_are_deleted(self):
+        call_command("gc_media", "--rate", "1000000", stdout=StringIO())
+        self.assertFalse(self.exists("profile_images/old.png"))
+        for name in ("profile_images/me.png", "profile_images/me__w320.webp", "profile_images/fresh.png"):
+            self.assertTrue(self.exists(name), name)
+
+
+class PublicPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("profiles.views.record_profile_view")
+        self.record_view = patcher.start()
+        self.addCleanup(patcher.stop)
+        user = get_user_model().objects.create_user(email="page@example.com", username="pageowner")
+        self.profile = Profile.objects.create(user=user, slug="me", full_name="First Name", visibility=Profile.PUBLIC)
+        self.url = reverse("profiles:public", args=["pageowner", "me"])
+
+    def test_second_view_is_served_from_the_cache(self):
+        self.assertContains(self.client.get(self.url), "First Name")
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(self.url), "First Name")
+        self.assertEqual(self.record_view.call_count, 2)
+
+    def test_profile_edit_invalidates_the_page(self):
+        self.client.get(self.url)
+        self.profile.full_name = "Second Name"
+        self.profile.save()
+        self.assertContains(self.client.get(self.url), "Second Name")
+
+    def test_section_edit_invalidates_the_page(self):
+        self.client.get(self.url)
+        ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.ABOUT, title="About", data={"content": "Fresh bio text"})
+        self.assertContains(self.client.get(self.url), "Fresh bio text")
+
+    def test_private_profiles_are_not_served(self):
+        self.profile.visibility = Profile.PRIVATE
+        self.profile.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="rollup@example.com", username="rollup")
+        self.profile = Profile.objects.create(user=user, slug="rollup", full_name="Rollup")
+        self.section = ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS, title="Site", data={"url": "https://example.com"})
+        self.now = datetime(2026, 3, 3, 12, 0, tzinfo=dt_timezone.utc)
+
+    def view(self, at, ip="10.0.0.1"):
+        ProfileView.objects.create(profile=self.profile, ip_address=ip, timestamp=at)
+
+    def stats(self):
+        return {row.date: (row.views, row.clicks, row.unique_visitors) for row in ProfileDailyStats.objects.all()}
+
+    def test_rollup_counts_each_day(self):
+        self.view(self.now - timedelta(days=1))
+        self.view(self.now - timedelta(days=1))
+        self.view(self.now - timedelta(hours=1), ip="10.0.0.2")
+        LinkClick.objects.create(profile_section=self.section, profile=self.profile, timestamp=self.now - timedelta(hours=2))
+
+        self.assertEqual(rollups.run_rollup(now=self.now), (date(2026, 3, 2), date(2026, 3, 3), 2))
+        self.assertEqual(self.stats(), {date(2026, 3, 2): (2, 0, 1), date(2026, 3, 3): (1, 1, 1)})
+        watermark = AnalyticsWatermark.objects.get(name=rollups.WATERMARK_NAME).value
+        self.assertEqual(watermark, self.now - rollups.ROLLUP_LAG)
+
+    def test_rerunning_is_idempotent(self):
+        self.view(self.now - timedelta(hours=1))
+        rollups.run_rollup(now=self.now)
+        rollups.run_rollup(now=self.now)
+        self.assertEqual(self.stats(), {date(2026, 3, 3): (1, 0, 1)})
+
+    def test_closed_days_are_not_recomputed(self):
+        self.view(self.now - timedelta(days=2))
+        rollups.run_rollup(now=self.now)
+        # Late row for a day before the watermark: only a --full rebuild picks it up
+        self.view(self.now - timedelta(days=2), ip="10.0.0.9")
+        later = self.now + timedelta(days=1)
+        self.view(later - timedelta(hours=1))
+
+        self.assertEqual(rollups.run_rollup(now=later)[0], date(2026, 3, 3))
+        self.assertEqual(self.stats()[date(2026, 3, 1)], (1, 0, 1))
+        self.assertEqual(self.stats()[date(2026, 3, 4)], (1, 0, 1))
+
+        rollups.run_rollup(full=True, now=later)
+        self.assertEqual(self.stats()[date(2026, 3, 1)], (2, 0, 2))
+
+    def test_rebuild_starts_at_the_retention_horizon(self):
+        self.view(self.now - timedelta(days=2))
+        self.view(self.now - timedelta(hours=1))
+        AnalyticsWatermark.objects.create(name=rollups.RETENTION_WATERMARK, value=self.now - timedelta(days=1))
+        self.assertEqual(rollups.run_rollup(full=True, now=self.now)[0], date(2026, 3, 2))
+        self.assertNotIn(date(2026, 3, 1), self.stats())
+
+    def test_command_reports_when_there_is_nothing_to_do(self):
+        out = StringIO()
+        call_command("rollup_analytics", stdout=out)
+        self.assertIn("No analytics events", out.getvalue())
+        self.assertTrue(AnalyticsWatermark.objects.filter(name=rollups.WATERMARK_NAME).exists())
+
+
+class LinkClickProfileTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="clicks@example.com", username="clicks")
+        self.profile = Profile.objects.create(user=user, slug="clicks", full_name="Clicks")
+        self.section = ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS, title="Site", data={"url": "https://example.com/"})
+
+    @mock.patch("profiles.analytics.BUFFERING", False)
+    def test_tracked_click_stores_the_profile(self):
+        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+        response = self.client.get(reverse("profiles:track_click", args=[self.section.id]), HTTP_USER_AGENT=user_agent)
+        self.assertRedirects(response, "https://example.com/", fetch_redirect_response=False)
+        click = LinkClick.objects.get()
+        self.assertEqual((click.profile_section_id, click.profile_id), (self.section.id, self.profile.id))
+
+    def test_backfill_fills_missing_profiles(self):
+        LinkClick.objects.bulk_create([LinkClick(profile_section=self.section) for _ in range(3)])
+        migration = importlib.import_module("profiles.migrations.0005_backfill_linkclick_profile")
+        with mock.patch.object(migration, "CHUNK_SIZE", 2):
+            migration.backfill_link_click_profile(apps, None)
+        self.assertEqual(LinkClick.objects.filter(profile=self.profile).count(), 3)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="retention@example.com", username="retention")
+        self.profile = Profile.objects.create(user=user, slug="retention", full_name="Retention")
+        self.section = ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS, title="Site", data={"url": "https://example.com"})
+        self.old = datetime(2020, 1, 15, 12, 0, tzinfo=dt_timezone.utc)
+        ProfileView.objects.create(profile=self.profile, ip_address="10.0.0.1", timestamp=self.old)
+        ProfileView.objects.create(profile=self.profile, ip_address="10.0.0.1")
+        LinkClick.objects.create(profile_section=self.section, profile=self.profile, timestamp=self.old)
+        self.cutoff = date(2020, 2, 1)
+
+    def test_month_helpers(self):
+        self.assertEqual(retention.add_months(date(2020, 11, 1), 3), date(2021, 2, 1))
+        self.assertEqual(retention.add_months(date(2020, 1, 1), -1), date(2019, 12, 1))
+        self.assertEqual(retention.month_start(date(2020, 5, 17)), date(2020, 5, 1))
+        self.assertEqual(retention.partition_name(date(2020, 5, 1)), "profiles_profileview_y2020m05")
+
+    def test_prune_rolls_up_before_deleting(self):
+        retention.prune_before(self.cutoff)
+
+        self.assertEqual(ProfileView.objects.count(), 1)
+        self.assertFalse(LinkClick.objects.exists())
+        old_day = ProfileDailyStats.objects.get(date=date(2020, 1, 15))
+        self.assertEqual((old_day.views, old_day.clicks), (1, 1))
+        horizon = AnalyticsWatermark.objects.get(name=rollups.RETENTION_WATERMARK).value
+        self.assertEqual(horizon, rollups.start_of_day(self.cutoff))
+
+        # A full rebuild afterwards keeps the pruned days it can no longer recompute
+        rollups.run_rollup(full=True)
+        self.assertTrue(ProfileDailyStats.objects.filter(date=date(2020, 1, 15)).exists())
+
+    def test_dry_run_changes_nothing(self):
+        actions = retention.prune_before(self.cutoff, dry_run=True)
+        self.assertIn("roll up analytics up to now", actions)
+        self.assertEqual(ProfileView.objects.count(), 2)
+        self.assertEqual(LinkClick.objects.count(), 1)
+        self.assertFalse(ProfileDailyStats.objects.exists())
+        self.assertFalse(AnalyticsWatermark.objects.exists())
+
+    def test_command_keeps_the_configured_months(self):
+        out = StringIO()
+        call_command("analytics_retention", "--keep-months", "1", "--dry-run", stdout=out)
+        self.assertIn(f"Raw analytics kept from {retention.month_start(timezone.localdate())}", out.getvalue())
+        self.assertIn("[dry-run] delete 1 link clicks", out.getvalue())
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "ProfileView is only partitioned on PostgreSQL")
+class PartitionTests(TestCase):
+    def test_ensure_partitions_creates_upcoming_months(self):
+        retention.ensure_partitions(months_ahead=2)
+        this_month = retention.month_start(timezone.localdate())
+        expected = {retention.add_months(this_month, offset) for offset in range(3)}
+        self.assertTrue(retention.is_partitioned())
+        self.assertLessEqual(expected, set(retention.monthly_partitions()))
+        self.assertEqual(retention.ensure_partitions(months_ahead=2), [])
+
+    def test_expired_partitions_are_dropped(self):
+        month = date(2020, 1, 1)
+        retention._create_partition(month)
+        retention.prune_before(date(2020, 3, 1))
+        self.assertNotIn(month, retention.monthly_partitions())
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def sketch(self, values):
+        sketch = HyperLogLog()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def test_estimates_within_a_few_percent(self):
+        for true_count in (10, 1000, 50000):
+            estimate = self.sketch(f"visitor-{i}" for i in range(true_count)).count()
+            self.assertLess(abs(estimate - true_count) / true_count, 0.05, (true_count, estimate))
+
+    def test_duplicates_are_counted_once(self):
+        self.assertEqual(self.sketch(["a", "b", "a", "a", b"b"]).count(), 2)
+
+    def test_merge_counts_the_union(self):
+        left = self.sketch(f"visitor-{i}" for i in range(0, 3000))
+        right = self.sketch(f"visitor-{i}" for i in range(2000, 5000))
+        union = self.sketch(f"visitor-{i}" for i in range(5000))
+        self.assertEqual(left.merge(right).to_bytes(), union.to_bytes())
+
+    def test_bytes_round_trip(self):
+        sketch = self.sketch(["a", "b", "c"])
+        self.assertEqual(HyperLogLog.from_bytes(sketch.to_bytes()).to_bytes(), sketch.to_bytes())
+        with self.assertRaises(ValueError):
+            HyperLogLog(registers=b"\0" * 10)
+        with self.assertRaises(ValueError):
+            HyperLogLog().merge(HyperLogLog(precision=10))
+
+
+class VisitorSketchTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="sketch@example.com", username="sketch")
+        self.profile = Profile.objects.create(user=user, slug="sketch", full_name="Sketch")
+        self.day = datetime(2026, 3, 3, 12, 0, tzinfo=dt_timezone.utc)
+
+    def test_flushes_merge_into_one_row_per_day(self):
+        add_visitors([(self.profile.id, self.day, "a"), (self.profile.id, self.day, "b")])
+        add_visitors([(self.profile.id, self.day, "b"), (self.profile.id, self.day, "c")])
+        add_visitors([(self.profile.id, self.day + timedelta(days=1), "a")])
+
+        self.assertEqual(ProfileVisitorSketch.objects.filter(profile=self.profile).count(), 2)
+        self.assertEqual(unique_visitors(self.profile, date(2026, 3, 3), date(2026, 3, 3)), 3)
+        self.assertEqual(unique_visitors(self.profile, date(2026, 3, 3), date(2026, 3, 4)), 3)
+        self.assertEqual(unique_visitors(self.profile, date(2026, 3, 4), date(2026, 3, 4)), 1)
+        self.assertEqual(unique_visitors(self.profile, date(2026, 3, 5), date(2026, 3, 9)), 0)
+
+
+@mock.patch("profiles.search.use_postgres", return_value=False)
+class SearchFallbackIndexTests(TestCase):
+    def setUp(self):
+        search.index.reset()
+        self.addCleanup(search.index.reset)
+        self.ada = self.profile("ada", full_name="Ada Lovelace", bio="Analytical engine notes")
+        self.grace = self.profile("grace", full_name="Grace Hopper", bio="Compilers and Lovelace fan")
+
+    def profile(self, username, **fields):
+        user = get_user_model().objects.create_user(email=f"{username}@example.com", username=username)
+        return Profile.objects.create(user=user, slug=username, visibility=Profile.PUBLIC, **fields)
+
+    def test_prefix_terms_must_all_match(self, _):
+        self.assertEqual(search.search_profiles("lovel"), [self.ada.id, self.grace.id])
+        self.assertEqual(search.search_profiles("lovelace COMP"), [self.grace.id])
+        self.assertEqual(search.search_profiles("lovelace cobol"), [])
+        self.assertEqual(search.search_profiles("  !! "), [])
+
+    def test_index_follows_saves_and_deletes(self, _):
+        self.assertEqual(search.search_profiles("django"), [])
+
+        ProfileSection.objects.create(profile=self.ada, section_type=ProfileSection.SKILLS, title="Web", data={"name": "Django"})
+        self.assertEqual(search.search_profiles("django"), [self.ada.id])
+
+        self.grace.full_name = "Django Hopper"
+        self.grace.save()
+        self.assertEqual(search.search_profiles("django"), [self.grace.id, self.ada.id])
+
+        self.grace.delete()
+        self.assertEqual(search.search_profiles("hopper"), [])
+
+    def test_private_profiles_are_not_indexed(self, _):
+        self.grace.visibility = Profile.PRIVATE
+        self.grace.save()
+        self.assertEqual(search.search_profiles("lovelace"), [self.ada.id])
+
+    def test_rebuild_reloads_the_index(self, _):
+        search.search_profiles("ada")
+        Profile.objects.filter(id=self.ada.id).update(full_name="Augusta King")
+        self.assertEqual(search.rebuild(), 2)
+        self.assertEqual(search.search_profiles("augusta"), [self.ada.id])
+
+
+@mock.patch.multiple("profiles.trending", WINDOW_DAYS=14, HALF_LIFE_DAYS=3, CLICK_WEIGHT=3)
+class TrendingTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="trend@example.com", username="trend")
+        self.profile = Profile.objects.create(user=user, slug="trend", full_name="Trend")
+        self.section = ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS, title="Site", data={"url": "https://example.com"})
+        self.now = datetime(2026, 3, 20, 12, 0, tzinfo=dt_timezone.utc)
+
+    def view(self, days_ago):
+        ProfileView.objects.create(profile=self.profile, ip_address="10.0.0.1", timestamp=self.now - timedelta(days=days_ago))
+
+    def test_activity_decays_with_age(self):
+        self.view(0)
+        self.view(3)
+        self.view(20)  # outside the window
+        LinkClick.objects.create(profile_section=self.section, profile=self.profile, timestamp=self.now)
+        self.assertAlmostEqual(trending.compute_scores(self.now)[self.profile.id], 1 + 0.5 + 3)
+
+    def test_closed_days_come_from_the_rollups(self):
+        ProfileDailyStats.objects.create(profile=self.profile, date=date(2026, 3, 14), views=4, clicks=0)
+        self.view(6)  # already counted by the rollup row above
+        AnalyticsWatermark.objects.create(name=rollups.WATERMARK_NAME, value=self.now - timedelta(days=1))
+        self.assertAlmostEqual(trending.compute_scores(self.now)[self.profile.id], 4 * 0.25)
+
+    def test_refresh_only_writes_changes(self):
+        self.view(0)
+        self.assertEqual(trending.refresh_scores(self.now), 1)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.trending_score, 1.0)
+        self.assertEqual(trending.refresh_scores(self.now), 0)
+
+        # A profile that went quiet drops back to zero
+        self.assertEqual(trending.refresh_scores(self.now + timedelta(days=30)), 1)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.trending_score, 0)
+
+
+class SectionFragmentCacheTests(SimpleTestCase):
+    BLOCK = '{% load section_cache %}{% for section in sections %}{% section_cache section "modern" %}[{{ section.title }}]{% endsection_cache %}{% endfor %}'
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, sections, source=BLOCK):
+        return Template(source).render(Context({"sections": sections}))
+
+    def test_fragments_are_reused_until_the_section_changes(self):
+        sections = [{"id": 1, "updated_at": 100, "title": "One"}, {"id": 2, "updated_at": 100, "title": "Two"}]
+        self.assertEqual(self.render(sections), "[One][Two]")
+
+        sections[0]["title"] = "Changed in place"
+        sections[1].update(title="Edited", updated_at=101)
+        self.assertEqual(self.render(sections), "[One][Edited]")
+
+    def test_all_fragments_are_fetched_in_one_lookup(self):
+        sections = [{"id": index, "updated_at": 100, "title": str(index)} for index in range(1, 6)]
+        self.render(sections)
+        with mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            self.assertEqual(self.render(sections), "[1][2][3][4][5]")
+        get_many.assert_called_once()
+
+    def test_unsaved_sections_are_always_rendered(self):
+        self.assertIsNone(section_fragment_key({"title": "Preview"}, "modern", "v1"))
+        self.assertEqual(self.render([{"title": "Preview"}]), "[Preview]")
+        self.assertEqual(self.render([{"title": "Changed"}]), "[Changed]")
+
+    def test_key_covers_theme_and_template_code(self):
+        section = {"id": 1, "updated_at": 100, "title": "One"}
+        self.assertNotEqual(section_fragment_key(section, "modern", "v1"), section_fragment_key(section, "minimal", "v1"))
+        saved = ProfileSection(pk=3, updated_at=datetime(2026, 3, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(section_fragment_key(saved, "modern", "v1"), "profiles:section:3:1772323200000000:modern:v1")
+        self.render([section])
+        edited_block = self.BLOCK.replace("[{{ section.title }}]", "<{{ section.title }}>")
+        self.assertEqual(self.render([section], edited_block), "<One>")
+
+    def test_tag_arguments_are_checked(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template("{% load section_cache %}{% section_cache section %}{% endsection_cache %}")
+
+
+class RenderDocumentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(email="doc@example.com", username="docowner")
+        self.profile = Profile.objects.create(user=user, slug="doc", full_name="Doc Owner", visibility=Profile.PUBLIC)
+
+    def document(self):
+        self.profile.refresh_from_db()
+        return self.profile.render_document
+
+    def grouped_titles(self):
+        return [(group["grouper"], [section["title"] for section in group["list"]]) for group in self.document()["groups"]]
+
+    def test_group_sections_groups_consecutive_types(self):
+        sections = [{"section_type": kind} for kind in ("LINKS", "LINKS", "SKILLS", "LINKS")]
+        self.assertEqual(
+            [(group["grouper"], len(group["list"])) for group in render_document.group_sections(sections)],
+            [("LINKS", 2), ("SKILLS", 1), ("LINKS", 1)],
+        )
+
+    def test_section_changes_rebuild_the_document(self):
+        self.assertEqual(self.document()["version"], render_document.VERSION)
+        self.assertEqual(self.document()["profile"]["full_name"], "Doc Owner")
+
+        ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.SKILLS, title="Python", order=2)
+        link = ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS, title="Site", order=1, data={"url": "https://example.com"})
+        ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.LINKS, title="Hidden", order=3, is_enabled=False)
+        self.assertEqual(self.grouped_titles(), [("LINKS", ["Site"]), ("SKILLS", ["Python"])])
+
+        link.delete()
+        self.assertEqual(self.grouped_titles(), [("SKILLS", ["Python"])])
+
+    def test_profile_edit_rebuilds_but_score_updates_do_not(self):
+        self.profile.full_name = "Renamed"
+        self.profile.save()
+        self.assertEqual(self.document()["profile"]["full_name"], "Renamed")
+
+        with mock.patch.object(render_document, "rebuild") as rebuild:
+            self.profile.trending_score = 5
+            self.profile.save(update_fields=["trending_score"])
+        rebuild.assert_not_called()
+
+    @mock.patch("profiles.views.record_profile_view")
+    def test_public_page_rebuilds_a_stale_document(self, _):
+        ProfileSection.objects.create(profile=self.profile, section_type=ProfileSection.ABOUT, title="About", data={"content": "From the sections"})
+        Profile.objects.filter(pk=self.profile.pk).update(render_document={})
+
+        response = self.client.get(reverse("profiles:public", args=["docowner", "doc"]))
+        self.assertContains(response, "From the sections")
+        self.assertEqual(self.document()["version"], render_document.VERSION)
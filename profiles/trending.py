@@ -0,0 +1,93 @@
+"""
+Trending scores for the showcase.
+
+A profile's score is its views plus weighted clicks over the last
+TRENDING_WINDOW_DAYS days, each day decayed by its age with a half-life of
+TRENDING_HALF_LIFE_DAYS. `refresh_scores` recomputes every score from the
+daily rollups (plus raw rows for the days the rollup hasn't closed yet)
+and writes the ones that changed into Profile.trending_score, so sorting
+the showcase by it is a plain index scan.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Profile, ProfileView, LinkClick, ProfileDailyStats
+from .rollups import rollup_boundary, start_of_day
+
+WINDOW_DAYS = getattr(settings, "TRENDING_WINDOW_DAYS", 14)
+HALF_LIFE_DAYS = getattr(settings, "TRENDING_HALF_LIFE_DAYS", 3)
+CLICK_WEIGHT = getattr(settings, "TRENDING_CLICK_WEIGHT", 3)
+
+
+def compute_scores(now=None):
+    """Returns {profile_id: score} for every profile with activity in the window."""
+    today = timezone.localdate(now or timezone.now())
+    first_day = today - timedelta(days=WINDOW_DAYS - 1)
+    boundary = rollup_boundary()
+
+    activity = {}  # (profile_id, day) -> views + weighted clicks
+
+    def add(profile_id, day, amount):
+        activity[(profile_id, day)] = activity.get((profile_id, day), 0) + amount
+
+    # Closed days from the rollups
+    if boundary and boundary > first_day:
+        rollups = (
+            ProfileDailyStats.objects.filter(date__gte=first_day, date__lt=boundary)
+            .values_list('profile_id', 'date', 'views', 'clicks')
+        )
+        for profile_id, day, views, clicks in rollups.iterator():
+            add(profile_id, day, views + CLICK_WEIGHT * clicks)
+
+    # Open days counted from the raw rows
+    open_from = start_of_day(max(boundary, first_day) if boundary else first_day)
+    views = (
+        ProfileView.objects.filter(timestamp__gte=open_from)
+        .annotate(date=TruncDate('timestamp'))
+        .values_list('profile_id', 'date')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for profile_id, day, count in views.iterator():
+        add(profile_id, day, count)
+
+    clicks = (
+        LinkClick.objects.filter(timestamp__gte=open_from, profile__isnull=False)
+        .annotate(date=TruncDate('timestamp'))
+        .values_list('profile_id', 'date')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for profile_id, day, count in clicks.iterator():
+        add(profile_id, day, CLICK_WEIGHT * count)
+
+    scores = {}
+    for (profile_id, day), amount in activity.items():
+        decay = 0.5 ** (max((today - day).days, 0) / HALF_LIFE_DAYS)
+        scores[profile_id] = scores.get(profile_id, 0) + amount * decay
+    return scores
+
+
+def refresh_scores(now=None, batch_size=1000):
+    """
+    Write the current scores into Profile.trending_score. Only rows whose
+    score changed are touched; profiles that went quiet drop back to 0.
+    Returns the number of profiles updated.
+    """
+    scores = {profile_id: round(score, 4) for profile_id, score in compute_scores(now).items()}
+    current = dict(Profile.objects.filter(trending_score__gt=0).values_list('id', 'trending_score'))
+
+    changed = {profile_id: score for profile_id, score in scores.items() if current.get(profile_id) != score}
+    changed.update({profile_id: 0.0 for profile_id in current if profile_id not in scores})
+
+    # bulk_update skips save(): no signals, no cache invalidation, updated_at untouched
+    Profile.objects.bulk_update(
+        [Profile(id=profile_id, trending_score=score) for profile_id, score in sorted(changed.items())],
+        ['trending_score'],
+        batch_size=batch_size,
+    )
+    return len(changed)
@@ -11,6 +11,7 @@ from .views import (
     reorder_sections,
     update_theme,
     track_link_click,
+    favicon,
     subscription,
     payment_success,
     create_checkout_session,
@@ -41,6 +42,7 @@ urlpatterns = [
     # Actions 
     path("delete/<int:profile_id>", delete_profile, name='delete'),
     path('track/click/<int:section_id>', track_link_click, name='track_click'),
+    path('favicon/<str:domain>/', favicon, name='favicon'),
 
     path('delete/verify/', verify_delete_account, name='verify_delete_account'),
     path('account/', account_settings, name='account'),
@@ -3,7 +3,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import Http404, HttpResponseForbidden, JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.conf import settings
 from django.views.decorators.http import require_POST
@@ -11,12 +12,20 @@ from django.views.decorators.csrf import csrf_exempt
 import json
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.core.exceptions import ValidationError
 from datetime import timedelta
 
-from .models import Profile, ProfileSection,Theme,ProfileView,LinkClick,Subscription
+from accounts.uploads import attach_upload
+
+from .models import Profile, ProfileSection,Theme,Subscription
 from .forms import ProfileForm, ProfileSectionForm,UserUpdateForm,ProfileUpdateForm
 from .constants import FREE_PROFILE_LIMIT
 from .utils import get_active_profile
+from . import analytics, bots, favicons, render_document
+from .dedup import recent_visitors
+from .redirects import resolve_link
+from .cache import get_cached_page, cache_page, invalidate_profile, DEFAULT_THEME
 
 # Initialize Client
 razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
@@ -170,6 +179,9 @@ def reorder_sections(request):
         
         # Save all at once
         ProfileSection.objects.bulk_update(sections_to_update, ['order'])
+        # bulk_update skips post_save, so rebuild the document and clear the public page ourselves
+        render_document.rebuild([profile.id])
+        invalidate_profile(profile.id)
                 
         return JsonResponse({'status': 'success'})
     except Exception as e:
@@ -195,9 +207,15 @@ def section_list_create(request):
             # --- 1. IMAGE HANDLING (Profile Level) ---
             if section_type == 'PERSONAL':
                 uploaded_image = request.FILES.get('profile_image')
+                upload_token = form.cleaned_data.get('profile_image_key')
                 if uploaded_image:
                     profile.profile_image = uploaded_image
                     profile.save()
+                elif upload_token:
+                    try:
+                        attach_upload(profile, 'profile_image', upload_token, request.user)
+                    except ValidationError as e:
+                        messages.error(request, f"Upload Failed: {e.messages[0]}")
 
             # --- 2. DETERMINE IF UPDATE OR CREATE ---
             existing_section = None
@@ -286,46 +304,90 @@ def delete_section(request, section_id):
     return redirect("profiles:sections")
 
 User = get_user_model()
+
+# implimenting Analytics logic
+# De-duplicated per (profile, ip, user agent) in memory, no session row per visitor
+def record_profile_view(request, profile_id):
+    ip_address = get_client_ip(request)
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    # Crawlers / link previewers are only tallied in memory, never written
+    if bots.is_bot(user_agent, ip_address):
+        bots.count_hit("view")
+        return
+    if recent_visitors.seen(profile_id, ip_address, user_agent):
+        return
+    analytics.record_profile_view(profile_id, ip_address, user_agent)
+
 def public_profile_view(request,username, profile_slug):
-    user_obj = get_object_or_404(User,username=username)
-    profile = get_object_or_404(Profile, user = user_obj, slug=profile_slug)
+    # Hot path: serve the cached render without touching the DB or template engine
+    cached = get_cached_page(username, profile_slug)
+    if cached:
+        profile_id, html = cached
+        record_profile_view(request, profile_id)
+        return HttpResponse(html, content_type="text/html")
+
+    # One row: visibility, theme and the pre-grouped render document
+    profile = get_object_or_404(
+        Profile.objects.select_related('theme').only('id', 'visibility', 'render_document', 'theme__template_name', 'theme__slug'),
+        user__username=username, slug=profile_slug,
+    )
 
     if profile.visibility == Profile.PRIVATE:
         raise Http404()
-    
-    sections = profile.sections.filter(is_enabled=True)
-
-# implimenting Analytics logic 
-    session_key = f"profile_view_{profile.id}"
-    if not request.session.get(session_key):
-        ProfileView.objects.create(profile=profile,ip_address=get_client_ip(request))
-        request.session[session_key] = True
-        request.session.set_expiry(60*30)  # Expiry in 30 minutes
-    
+
+    document = profile.render_document
+    if document.get('version') != render_document.VERSION:
+        # Not built yet (or built by an older layout)
+        document = render_document.rebuild([profile.id])[profile.id]
+
+    record_profile_view(request, profile.id)
 
     #logic for dynamic rendering
     if profile.theme:
         template_name = profile.theme.template_name
+        theme_key = profile.theme.slug
     else:
         #fallback if db is empty
         template_name = "profiles/themes/modern.html"
+        theme_key = DEFAULT_THEME
 
-    return render(
-        request,
-        template_name,
-        {"profile": profile, "sections": sections},
-        content_type="text/html"
-    )
+    # Rendered without the request so the cached HTML is the same for every visitor
+    html = render_to_string(template_name, render_document.render_context(document))
+    cache_page(profile, username, profile_slug, theme_key, html)
+
+    return HttpResponse(html, content_type="text/html")
 
 # View for tracking link clicks
 
 def track_link_click(request,section_id):
-    section = get_object_or_404(ProfileSection,id = section_id)
-    #capturing the click
-    LinkClick.objects.create(profile_section=section)
+    # Answered from the in-memory redirect map, no DB read for hot links
+    target = resolve_link(section_id)
+    if target is None:
+        raise Http404()
+    target_url, profile_id = target
+
+    #capturing the click (buffered, written in batches), bots are only tallied
+    if bots.is_bot(request.META.get('HTTP_USER_AGENT', ''), get_client_ip(request)):
+        bots.count_hit("click")
+    else:
+        analytics.record_link_click(section_id, profile_id)
+
+    return redirect(target_url or '#')
+
+# First-party favicon for LINKS sections (see favicons.py)
+def favicon(request, domain):
+    if favicons.domain_for(domain) != domain:
+        raise Http404()
+    icon = favicons.get_favicon(domain)
+    if icon is None:
+        raise Http404()
 
-    target_url = section.data.get('url','#')
-    return redirect(target_url)
+    response = get_conditional_response(request, etag=icon["etag"])
+    if response is None:
+        response = HttpResponse(icon["body"], content_type=icon["content_type"])
+    response["ETag"] = icon["etag"]
+    patch_cache_control(response, public=True, max_age=24 * 60 * 60)
+    return response
 
 # Subscription section 
 def subscription(request):
@@ -0,0 +1,41 @@
+// Direct-to-bucket photo uploads for forms marked with data-direct-upload="<presign url>".
+// The chosen file is POSTed straight to storage, the form is then submitted with
+// the returned token (profile_image_key) instead of the file. If presigning isn't
+// available or the upload fails, the form is submitted normally with the file.
+document.querySelectorAll('form[data-direct-upload]').forEach(function (form) {
+    const fileInput = form.querySelector('input[type="file"][name="profile_image"]');
+    const keyInput = form.querySelector('input[name="profile_image_key"]');
+    if (!fileInput || !keyInput) return;
+
+    let uploading = false;
+
+    form.addEventListener('submit', async function (e) {
+        const file = fileInput.files[0];
+        if (!file || uploading) return;
+        e.preventDefault();
+        uploading = true;
+
+        try {
+            const body = new FormData();
+            body.append('filename', file.name);
+            body.append('csrfmiddlewaretoken', form.querySelector('[name=csrfmiddlewaretoken]').value);
+            const presign = await fetch(form.dataset.directUpload, { method: 'POST', body: body, credentials: 'same-origin' });
+            if (!presign.ok) throw new Error('presign unavailable');
+            const upload = await presign.json();
+
+            const data = new FormData();
+            Object.entries(upload.fields).forEach(([name, value]) => data.append(name, value));
+            data.append('Content-Type', file.type || 'image/jpeg');
+            data.append('file', file);  // must be the last field
+            const stored = await fetch(upload.url, { method: 'POST', body: data });
+            if (!stored.ok) throw new Error('upload failed');
+
+            keyInput.value = upload.token;
+            fileInput.value = '';
+        } catch (err) {
+            // Fall back to sending the file through the form
+            keyInput.value = '';
+        }
+        form.submit();
+    });
+});